@@ -0,0 +1,28 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.core.config import settings
+from app.db.neo4j.cache import clear_graph_cache
+
+
+async def require_admin_token(x_admin_token: str | None = Header(default=None)) -> None:
+    """
+    Admin routes need X-Admin-Token to match settings.admin_token;
+    with no token configured they're off.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(
+    prefix="/api/v1/admin", tags=["admin"], dependencies=[Depends(require_admin_token)]
+)
+
+
+@router.post("/cache/flush")
+async def flush_cache() -> dict[str, int]:
+    """Invalidate cached Neo4j graphs, e.g. after a manual re-bootstrap."""
+    return {"flushed": clear_graph_cache()}
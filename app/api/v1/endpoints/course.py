@@ -1,109 +1,123 @@
-from typing import List, Dict, Any
+import logging
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Tuple
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 
+from app.core.responses import ORJSONResponse
+from app.db.neo4j.cache import (
+    cached_collect_bidirectional_graph,
+    cached_collect_graph,
+    cached_collect_graph_for_ids,
+)
+from app.db.neo4j.graph_adapter import get_neo4j
+from app.db.postgres.crud import COURSE_LIST_FIELDS, get_all_course_rows, get_course_detail_by_code
 from app.db.postgres.session import get_session
-from app.db.postgres.crud import get_all_courses, get_course_by_code
-from app.db.neo4j.graph_adapter import init_neo4j, get_neo4j, collect_graph_for_id
-from neo4j import AsyncGraphDatabase, AsyncDriver
 
-router = APIRouter(prefix="/api/v1", tags=["courses"])
+router = APIRouter(prefix="/api/v1", tags=["courses"], default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
+
 
+# runs of whitespace / dashes collapse to one space: "cs-135", " CS  135" -> "CS 135"
+_WS = re.compile(r"[\s\-]+")
+# "CS482" -> "CS 482": plan lists mix compact and spaced codes for the same course
+_COMPACT_CODE_RE = re.compile(r"^([A-Z]{2,})(\d)")
 
+
+@lru_cache(maxsize=4096)
 def _normalize_code_to_store(code: str) -> str:
-    return " ".join(code.replace("-", " ").strip().upper().split())
+    norm = _WS.sub(" ", code).strip().upper()
+    return _COMPACT_CODE_RE.sub(r"\1 \2", norm)
+
+
+@lru_cache(maxsize=4096)
+def _code_to_id_norm(norm: str) -> str:
+    # "CS 135" -> "CS-135"; `norm` must already be _normalize_code_to_store output
+    parts = norm.split(" ", 2)
+    return f"{parts[0]}-{parts[1]}" if len(parts) >= 2 else norm
 
 
 def _code_to_id(code: str) -> str:
-    # "CS 135" -> "CS-135"
-    parts = _normalize_code_to_store(code).split()
-    return f"{parts[0]}-{parts[1]}" if len(parts) >= 2 else code.replace(" ", "-")
+    return _code_to_id_norm(_normalize_code_to_store(code))
 
 
 @router.get("/courses/{code}")
-async def get_course(code: str, db: AsyncSession = Depends(get_session)):
+async def get_course(code: str, db: AsyncSession = Depends(get_session)) -> Dict[str, Any]:
     norm = _normalize_code_to_store(code)
-    course = await get_course_by_code(db, norm)
+    course = await get_course_detail_by_code(db, norm)
     if not course:
         raise HTTPException(status_code=404, detail="course not found")
 
-    # fetch constraints for this course (prereq / antireq)
-    sql = text(
-        "SELECT kind, target_course_id, group_id FROM course_constraint WHERE course_id = :course_id"
-    )
-    res = await db.execute(sql, {"course_id": course.id})
-    rows = res.mappings().all()
-
-    prereqs: List[Dict[str, Any]] = []
-    antireqs: List[Dict[str, Any]] = []
-    for r in rows:
-        tgt = r["target_course_id"]
-        entry = {"id": tgt, "code": tgt.replace("-", " ")}
-        if r["kind"] == "PREREQ":
-            entry["group_id"] = r["group_id"]
-            prereqs.append(entry)
-        elif r["kind"] == "ANTIREQ":
-            antireqs.append(entry)
-
     return {
-        "id": course.id,
-        "code": course.code,
-        "title": course.title,
-        "description": course.description,
-        "level": course.level,
-        "prereqs": prereqs,
-        "antireqs": antireqs,
+        "id": course["id"],
+        "code": course["code"],
+        "title": course["title"],
+        "description": course["description"],
+        "level": course["level"],
+        "prereqs": course["prereqs"],
+        "antireqs": course["antireqs"],
     }
 
 @router.get("/courses")
-async def get_courses(db: AsyncSession = Depends(get_session)):
-    courses = await get_all_courses(db)
-
-    def to_dict(course):
-        return {
-            "id": course.id,
-            "code": course.code,
-            "title": course.title,
-            "description": course.description,
-            "level": course.level,
-        }
-
-    return [to_dict(course) for course in courses]
+async def get_courses(db: AsyncSession = Depends(get_session)) -> ORJSONResponse:
+    rows = await get_all_course_rows(db)
+    return ORJSONResponse(content=[dict(zip(COURSE_LIST_FIELDS, row)) for row in rows])
 
 
 @router.get("/courses/{code}/backpath")
-async def get_backpath(code: str):
+async def get_backpath(code: str) -> ORJSONResponse:
     """Courses that lead to this course (prereq graph)"""
     try:
         cid = _code_to_id(code)
         driver = get_neo4j()
         if not driver:
             raise Exception("neo4j not available", driver)
-        graph = await collect_graph_for_id(driver, cid, rel_type="REQUIRES", depth=6)
-        return graph
+        graph = await cached_collect_graph(driver, cid, rel_type="REQUIRES", depth=6)
+        return ORJSONResponse(content=graph)
 
     except Exception as e:
-        print(f"Error in get_backpath: {e}")
+        logger.debug("get_backpath(%s) failed: %s", code, e)
         raise HTTPException(status_code=503, detail="neo4j not available")
 
 
 
 @router.get("/courses/{code}/frontpath")
-async def get_frontpath(code: str):
+async def get_frontpath(code: str) -> ORJSONResponse:
     """Courses that this course leads to (successor graph)"""
     cid = _code_to_id(code)
     driver = get_neo4j()
     if not driver:
         raise HTTPException(status_code=503, detail="neo4j not available")
-    graph = await collect_graph_for_id(driver, cid, rel_type="UNLOCKS", depth=6)
-    return graph
+    graph = await cached_collect_graph(driver, cid, rel_type="UNLOCKS", depth=6)
+    return ORJSONResponse(content=graph)
+
+
+@router.get("/courses/{code}/paths")
+async def get_paths(code: str) -> ORJSONResponse:
+    """Both directions at once: {"backpath": graph, "frontpath": graph} in one Neo4j round trip"""
+    cid = _code_to_id(code)
+    driver = get_neo4j()
+    if not driver:
+        raise HTTPException(status_code=503, detail="neo4j not available")
+    return ORJSONResponse(content=await cached_collect_bidirectional_graph(driver, cid, depth=6))
 
 
-# Hard-coded test plans (temporary)
+def _freeze(obj: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+# Hard-coded test plans (temporary); frozen so request handlers can't mutate shared plan data
 # ...existing code...
 # Detailed plan definition for Software Engineering (test/hard-coded)
-_SE_PLAN = {
+_SE_PLAN = _freeze({
     "name": "Software Engineering (BSE)",
     "total_units_required": 21.5,
     "required_courses": [
@@ -193,17 +207,20 @@ _SE_PLAN = {
         "Technical electives may not be taken before 3A term.",
         "Complementary studies lists A/C need to be filled with official course codes."
     ]
-}
+})
 
 # top-level plans mapping used by endpoints
-_PLANS = {
+_PLANS: Mapping[str, Any] = _freeze({
     "SE major": _SE_PLAN,
     "Software Engineering": _SE_PLAN,
-    "AI specialization": {"name": "AI specialization", "required_courses": ["CS 486", "CS 484", "MATH 239"]},
+    "AI specialization": {
+        "name": "AI specialization",
+        "required_courses": ["CS 486", "CS 484", "MATH 239"],
+    },
     "MTE minor": {"name": "MTE minor", "required_courses": ["MTE 121", "MTE 122"]},
-}
+})
 
-def _expand_plan_to_codes(plan_def: dict) -> List[str]:
+def _expand_plan_to_codes(plan_def: Mapping) -> List[str]:
     """Return a flattened list of course codes represented by a plan definition.
     For elective groups we include all candidate codes so the graph can show possible dependencies.
     """
@@ -236,56 +253,63 @@ def _expand_plan_to_codes(plan_def: dict) -> List[str]:
     # notes etc. ignore
     return sorted(codes)
 
+
+def _plan_codes(entry: Any) -> Tuple[str, ...]:
+    # if entry is a plan definition expand otherwise treat as flat list
+    if isinstance(entry, Mapping):
+        return tuple(_expand_plan_to_codes(entry))
+    if isinstance(entry, (list, tuple)):
+        return tuple(sorted({_normalize_code_to_store(c) for c in entry}))
+    return ()
+
+
+# Plans are static, so expand them to normalized codes / graph ids once at import
+# instead of on every /courses/by-plans request.
+_PLAN_CODES: Dict[str, Tuple[str, ...]] = {
+    name: _plan_codes(entry) for name, entry in _PLANS.items() if entry
+}
+_PLAN_IDS: Dict[str, Tuple[str, ...]] = {
+    name: tuple(_code_to_id_norm(c) for c in codes) for name, codes in _PLAN_CODES.items()
+}
+
 @router.post("/courses/by-plans")
-async def courses_by_plans(plans: List[str]):
+async def courses_by_plans(plans: List[str]) -> ORJSONResponse:
     """
     Input: JSON array of plan names.
     Returns combined prerequisite graphs for all selected plans (aggregated).
     Unknown plan names are reported in `unknown_plans`.
     """
     if not plans:
-        raise HTTPException(status_code=400, detail="request body must be a non-empty JSON array of plan names")
-
-    selected_codes = []
-    unknown = []
-    for p in plans:
-        entry = _PLANS.get(p)
-        if not entry:
-            unknown.append(p)
-            continue
-        # if entry is a dict plan definition expand otherwise treat as flat list
-        if isinstance(entry, dict):
-            selected_codes.extend(_expand_plan_to_codes(entry))
-        elif isinstance(entry, list):
-            selected_codes.extend([_normalize_code_to_store(c) for c in entry])
-
-    selected_codes = sorted(set(selected_codes))
+        raise HTTPException(
+            status_code=400, detail="request body must be a non-empty JSON array of plan names"
+        )
+
+    unknown = [p for p in plans if p not in _PLAN_CODES]
+    selected_codes = sorted({c for p in plans if p in _PLAN_CODES for c in _PLAN_CODES[p]})
     if not selected_codes:
-        return {"nodes": [], "links": [], "plans": plans, "requested_codes": [], "unknown_plans": unknown}
+        return ORJSONResponse(content={
+            "nodes": [],
+            "links": [],
+            "plans": plans,
+            "requested_codes": [],
+            "unknown_plans": unknown,
+        })
 
-    ids = [_code_to_id(c) for c in selected_codes]
+    ids = sorted({i for p in plans if p in _PLAN_IDS for i in _PLAN_IDS[p]})
     driver = get_neo4j()
     if not driver:
         raise HTTPException(status_code=503, detail="neo4j not available")
 
-    agg_nodes: Dict[str, Dict] = {}
-    agg_links: List[Dict] = []
-    for cid in ids:
-        sub = await collect_graph_for_id(driver, cid, rel_type="REQUIRES", depth=6)
-        for n in sub.get("nodes", []):
-            agg_nodes[n["id"]] = n
-        agg_links.extend(sub.get("links", []))
-
-    # dedupe links
-    seen = set()
-    uniq_links = []
-    for l in agg_links:
-        key = (l.get("start"), l.get("end"), l.get("type"), l.get("group_id"))
-        if key not in seen:
-            seen.add(key)
-            uniq_links.append(l)
-
-    resp = {"nodes": list(agg_nodes.values()), "links": uniq_links, "plans": plans, "requested_codes": selected_codes}
+    graph = await cached_collect_graph_for_ids(driver, ids, rel_type="REQUIRES", depth=6)
+
+    resp = {
+        "nodes": graph["nodes"],
+        "links": graph["links"],
+        "plans": plans,
+        "requested_codes": selected_codes,
+    }
     if unknown:
         resp["unknown_plans"] = unknown
-    return resp
\ No newline at end of file
+    # graphs can be thousands of nodes/links; skip jsonable_encoder
+    # and serialize with orjson directly
+    return ORJSONResponse(content=resp)
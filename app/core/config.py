@@ -1,7 +1,6 @@
 
-from pydantic import Field
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
-import os
 
 
 class Settings(BaseSettings):
@@ -14,18 +13,43 @@ class Settings(BaseSettings):
         case_sensitive=False
     )
 
-    env: str = Field(default="local", env="ENV")
-    cors_origins: list[str] = Field(default=["http://localhost:5173", "http://localhost:3000"], env="CORS_ORIGINS")
-
-    postgres_host: str = Field(default="pg", env="POSTGRES_HOST")
-    postgres_port: int = Field(default=5432, env="POSTGRES_PORT")
-    postgres_db: str = Field(default="uw", env="POSTGRES_DB")
-    postgres_user: str = Field(default="postgres", env="POSTGRES_USER")
-    postgres_password: str = Field(default="postgres", env="POSTGRES_PASSWORD")
-
-    neo4j_url: str = Field(default="bolt://neo4j:7687", env="NEO4J_URL")
-    neo4j_user: str = Field(default="neo4j", env="NEO4J_USER")
-    neo4j_password: str = Field(default="neo4j123", env="NEO4J_PASSWORD")
+    env: str = "local"
+    cors_origins: list[str] = ["http://localhost:5173", "http://localhost:3000"]
+
+    postgres_host: str = "pg"
+    postgres_port: int = 5432
+    postgres_db: str = "uw"
+    postgres_user: str = "postgres"
+    postgres_password: str = "postgres"
+
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 500
+
+    neo4j_url: str = "bolt://neo4j:7687"
+    neo4j_user: str = "neo4j"
+    neo4j_password: str = "neo4j123"
+    neo4j_max_connection_pool_size: int = 50
+    neo4j_connection_acquisition_timeout: float = 30.0
+    neo4j_keep_alive: bool = True
+    neo4j_max_connection_lifetime: float = 3600.0
+
+    graph_cache_ttl_seconds: int = 3600
+    graph_cache_maxsize: int = 4096
+
+    # startup skips scraping when both stores already hold at least this many courses
+    bootstrap_skip_min_courses: int = 5000
+    force_bootstrap: bool = False
+    # sqlite sidecar for scraped uCalendar pages (ETag/Last-Modified + parsed records);
+    # empty disables
+    scrape_cache_path: str = ".cache/ucalendar.sqlite3"
+    # cached pages younger than this are reused without any request
+    scrape_cache_ttl_seconds: int = 6 * 3600
+
+    # X-Admin-Token required by /api/v1/admin routes; empty disables them
+    admin_token: str = ""
 
     @property
     def postgres_url(self) -> str:
@@ -35,4 +59,3 @@ class Settings(BaseSettings):
         )
 
 settings = Settings()
-print(settings)
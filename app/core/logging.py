@@ -1,10 +1,19 @@
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 
 
 def configure_logging() -> None:
-    """Configure basic console logging if not already set."""
+    """
+    Configure basic console logging if not already set.
+    Records go through a QueueHandler, which merges the message with its args
+    in the calling thread (QueueHandler.prepare); a background QueueListener
+    thread applies the formatter and does the stdout write, so the event loop
+    never blocks on output.
+    """
     root = logging.getLogger()
     if root.handlers:
         return
@@ -14,5 +23,9 @@ def configure_logging() -> None:
         datefmt="%Y-%m-%d %H:%M:%S",
     )
     handler.setFormatter(formatter)
-    root.addHandler(handler)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    root.addHandler(QueueHandler(log_queue))
     root.setLevel(logging.INFO)
@@ -1,97 +1,205 @@
-from typing import Dict, List, Tuple
+import asyncio
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Mapping, Tuple
+
 from sqlalchemy.ext.asyncio import AsyncSession
+
+from .neo4j.cache import clear_graph_cache
+from .neo4j.graph_adapter import (
+    get_neo4j,
+    merge_antireq_edges_bulk,
+    merge_prereq_edges_bulk,
+    upsert_course_nodes_bulk,
+)
+from .postgres.crud import add_constraints, upsert_courses_bulk
 from .requirements_parsing import extract_constraints
-from .postgres.crud import upsert_course, add_constraints   # uses your existing CRUD + the new add_constraints
-from .neo4j.graph_adapter import get_neo4j, upsert_course_node, merge_prereq_edge, merge_antireq_edge
+
+logger = logging.getLogger(__name__)
 
 def _course_pk(subject: str, number: str) -> str:
     return f"{subject}-{number}"
 
+@lru_cache(maxsize=8192)
 def _id_from_code(code: str) -> str:
     # "CS 135" -> "CS-135"
     subj, num = code.split()
     return f"{subj}-{num}"
 
-def _normalize(rec: Dict) -> Dict:
-    subject = rec["subjectCode"]
-    number  = rec["catalogNumber"]
+_LEADING_DIGITS_RE = re.compile(r"^\d+")
+
+def _level(number: str) -> int | None:
+    # "136L" -> 100, "99" -> 0, "1000" -> 1000: the hundreds of the leading digit run
+    m = _LEADING_DIGITS_RE.match(number)
+    return int(m.group()) // 100 * 100 if m else None
+
+def _normalize(
+    subject: str,
+    number: str,
+    title: str | None,
+    description: str | None,
+    requirements: str | None,
+) -> Dict:
+    course_id = _course_pk(subject, number)
+    code = f"{subject} {number}"
+    requirements = requirements or ""
+    # parsed once here and resolved to target ids;
+    # used for both the Postgres rows and the graph edges
+    parsed = extract_constraints(requirements)
     return {
-        "id": _course_pk(subject, number),
-        "code": f"{subject} {number}",
+        "id": course_id,
+        "code": code,
         "subject": subject,
         "number": number,
-        "title": rec.get("title") or "",
-        "description": rec.get("description"),
-        "requirements": rec.get("requirementsDescription") or "",
+        "title": title or "",
+        "level": _level(number),
+        "description": description,
+        "requirements": requirements,
+        # [(group_id, [target ids...]), ...]
+        "prereq_groups": [
+            (f"{course_id}#g{gi}", [_id_from_code(code) for code in group])
+            for gi, group in enumerate(parsed["prereq_groups"], start=1)
+        ],
+        "antireqs": [_id_from_code(code) for code in parsed["antireqs"]],
     }
 
-def _rows_for_constraints(course_id: str, req: str) -> List[Tuple[str, str, str, str|None]]:
+# below this many records, parsing inline beats paying for worker start-up
+PARSE_POOL_MIN_RECORDS = 2000
+PARSE_CHUNK_SIZE = 500
+
+
+# scraped columns consumed by _normalize, in its argument order
+_NORMALIZE_COLUMNS = ("subject_code", "catalog_number", "title", "description", "requirements")
+
+
+def _normalize_batch(batch: List[Tuple]) -> List[Dict]:
+    # module-level so ProcessPoolExecutor can pickle it
+    return [_normalize(*row) for row in batch]
+
+
+async def _normalize_all(columns: Mapping[str, List]) -> List[Dict]:
+    """
+    Normalize (and requirement-parse) every course in the scraped columns.
+    Parsing is CPU-bound pure Python, so large catalogs are fanned out across
+    processes in chunks, which also keeps the event loop free; small inputs
+    are handled inline.
+    """
+    parsed = list(zip(*(columns[key] for key in _NORMALIZE_COLUMNS)))
+    if len(parsed) < PARSE_POOL_MIN_RECORDS:
+        return _normalize_batch(parsed)
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(pool, _normalize_batch, parsed[i:i + PARSE_CHUNK_SIZE])
+            for i in range(0, len(parsed), PARSE_CHUNK_SIZE)
+        ))
+    return [rec for batch in batches for rec in batch]
+
+def _rows_for_constraints(rec: Dict) -> List[Tuple[str, str, str, str|None]]:
     """
     Generate rows for course_constraint:
       (course_id, kind, target_course_id, group_id)
     """
+    course_id = rec["id"]
     out: List[Tuple[str, str, str, str|None]] = []
-    parsed = extract_constraints(req)
     # prereq groups
-    for gi, group in enumerate(parsed["prereq_groups"], start=1):
-        gid = f"{course_id}#g{gi}"
-        for code in group:
-            out.append((course_id, "PREREQ", _id_from_code(code), gid))
+    for gid, targets in rec["prereq_groups"]:
+        for target_id in targets:
+            out.append((course_id, "PREREQ", target_id, gid))
     # antireqs
-    for code in parsed["antireqs"]:
-        out.append((course_id, "ANTIREQ", _id_from_code(code), None))
+    for target_id in rec["antireqs"]:
+        out.append((course_id, "ANTIREQ", target_id, None))
     return out
 
-async def bootstrap_from_parsed_records(db: AsyncSession, parsed: List[Dict]) -> Dict:
-    """
-    Accepts paser results
-    Writes courses, constraints, and graph edges
-    """
-    records = [_normalize(r) for r in parsed]
-
+async def _load_postgres(
+    db: AsyncSession,
+    records: List[Dict],
+    constraint_rows: List[Tuple[str, str, str, str | None]],
+) -> None:
     # upsert courses Postgres
-    for r in records:
-        await upsert_course(
-            db,
-            id=r["id"],
-            code=r["code"],
-            title=r["title"],
-            description=r["description"],
-            level= int(r["code"][-3] + "00"),
-        )
-
-    # constraints → Postgres
-    all_rows: List[Tuple[str, str, str, str|None]] = []
-    for r in records:
-        all_rows.extend(_rows_for_constraints(r["id"], r["requirements"]))
-    if all_rows:
-        await add_constraints(db, all_rows)
+    # (keyed by id: a repeated course must not hit ON CONFLICT twice in one batch)
+    course_rows = {
+        r["id"]: {
+            "id": r["id"],
+            "code": r["code"],
+            "title": r["title"],
+            "description": r["description"],
+            "level": r["level"],
+        }
+        for r in records
+    }
+    await upsert_courses_bulk(db, list(course_rows.values()))
+
+    # constraints → Postgres (after the courses they reference)
+    if constraint_rows:
+        await add_constraints(db, constraint_rows)
+    # one transaction for the whole Postgres load
+    await db.commit()
 
+
+async def _load_graph(records: List[Dict]) -> None:
     # graph nodes + edges
     driver = get_neo4j()
+    if driver is None:
+        logger.warning("Neo4j driver not initialized; skipping graph bootstrap")
+        return
     try:
-        # nodes
-        for r in records:
-            await upsert_course_node(driver, id=r["id"], code=r["code"], title=r["title"], level=None)
+        nodes = [
+            # same keys on every node so each UNWIND batch has the same parameter shape
+            {"id": r["id"], "code": r["code"], "title": r["title"], "level": r["level"]}
+            for r in records
+        ]
 
-        # edges
+        prereq_edges: List[Dict] = []
+        antireq_edges: List[Dict] = []
         for r in records:
             course_id = r["id"]
-            parsed_req = extract_constraints(r["requirements"])
             # prereq groups
-            for gi, group in enumerate(parsed_req["prereq_groups"], start=1):
-                gid = f"{course_id}#g{gi}"
-                for code in group:
-                    await merge_prereq_edge(driver, to_id=course_id, from_id=_id_from_code(code), group_id=gid)
+            for gid, targets in r["prereq_groups"]:
+                for target_id in targets:
+                    prereq_edges.append({"to_id": course_id, "from_id": target_id, "group_id": gid})
             # antireqs (store both directions for practical lookups)
-            for code in parsed_req["antireqs"]:
-                other = _id_from_code(code)
-                await merge_antireq_edge(driver, a_id=course_id, b_id=other)
-                await merge_antireq_edge(driver, a_id=other, b_id=course_id)
+            for other in r["antireqs"]:
+                antireq_edges.append({"a_id": course_id, "b_id": other})
+                antireq_edges.append({"a_id": other, "b_id": course_id})
+
+        # one session for the whole graph load; nodes before edges
+        async with driver.session() as s:
+            await upsert_course_nodes_bulk(s, nodes)
+            await merge_prereq_edges_bulk(s, prereq_edges)
+            await merge_antireq_edges_bulk(s, antireq_edges)
     except Exception as e:
-        print("Error bootstrapping Neo4j graph:", e)
+        logger.error("Error bootstrapping Neo4j graph: %s", e)
+
+
+async def bootstrap_from_parsed_records(db: AsyncSession, parsed: Mapping[str, List]) -> Dict:
+    """
+    Accepts paser results (the column-wise catalog from `fetch_courses`)
+    Writes courses, constraints, and graph edges
+    The Postgres and Neo4j loads are independent, so they run concurrently;
+    each keeps its own nodes-before-edges order.
+    """
+    records = await _normalize_all(parsed)
+
+    all_rows: List[Tuple[str, str, str, str|None]] = []
+    for r in records:
+        all_rows.extend(_rows_for_constraints(r))
+
+    # let both loads settle before clearing, or a still-running graph load
+    # could repopulate the cache after a Postgres failure clears it
+    results = await asyncio.gather(
+        _load_postgres(db, records, all_rows), _load_graph(records), return_exceptions=True
+    )
+    # cached graphs predate this load
+    clear_graph_cache()
+    for res in results:
+        if isinstance(res, BaseException):
+            raise res
 
     return {
         "inserted": len(records),
         "constraints_rows": len(all_rows),
-    }
\ No newline at end of file
+    }
@@ -1,7 +1,9 @@
-from sqlalchemy import String, Text, Integer, ForeignKey, UniqueConstraint, CheckConstraint
+from sqlalchemy import CheckConstraint, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
+
 from ..postgres.session import Base
 
+
 class Course(Base):
     __tablename__ = "course"
     id: Mapped[str] = mapped_column(String, primary_key=True)
@@ -13,9 +15,13 @@ class Course(Base):
 class CourseTermRule(Base):
     __tablename__ = "course_term_rule"
     id: Mapped[str] = mapped_column(String, primary_key=True)
-    course_id: Mapped[str] = mapped_column(String, ForeignKey("course.id", ondelete="CASCADE"), nullable=False)
+    course_id: Mapped[str] = mapped_column(
+        String, ForeignKey("course.id", ondelete="CASCADE"), nullable=False
+    )
     season: Mapped[str] = mapped_column(Text, nullable=False)
-    __table_args__ = (CheckConstraint("season IN ('FALL','WINTER','SPRING')", name="ck_term_season"),)
+    __table_args__ = (
+        CheckConstraint("season IN ('FALL','WINTER','SPRING')", name="ck_term_season"),
+    )
 
 class CourseConstraint(Base):
     __tablename__ = "course_constraint"
@@ -32,6 +38,8 @@ class CourseConstraint(Base):
     group_id: Mapped[str | None] = mapped_column(String, nullable=True)
 
     __table_args__ = (
+        # the unique index leads with (course_id, kind) and holds every column the
+        # constraint lookups read, so it already serves them as an index-only scan
         UniqueConstraint(
             "course_id",
             "kind",
@@ -39,4 +47,6 @@ class CourseConstraint(Base):
             "group_id",
             name="uq_course_constraint",
         ),
+        # reverse lookups ("which courses require X")
+        Index("ix_cc_target", "target_course_id"),
     )
\ No newline at end of file
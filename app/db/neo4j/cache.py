@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Tuple
+
+from neo4j import AsyncDriver
+
+from app.core.config import settings
+
+from .graph_adapter import collect_bidirectional_graph, collect_graph_for_id, collect_graph_for_ids
+
+# key -> (expires_at, graph); ordered oldest-used first for LRU eviction
+_cache: "OrderedDict[Hashable, Tuple[float, Dict]]" = OrderedDict()
+
+
+def _get(key: Hashable) -> Dict | None:
+    hit = _cache.get(key)
+    if hit is None:
+        return None
+    expires_at, graph = hit
+    if expires_at < time.monotonic():
+        del _cache[key]
+        return None
+    _cache.move_to_end(key)
+    return graph
+
+
+def _put(key: Hashable, graph: Dict) -> None:
+    _cache[key] = (time.monotonic() + settings.graph_cache_ttl_seconds, graph)
+    _cache.move_to_end(key)
+    while len(_cache) > settings.graph_cache_maxsize:
+        _cache.popitem(last=False)
+
+
+async def cached_collect_graph(
+    driver: AsyncDriver, cid: str, rel_type: str = "REQUIRES", depth: int = 6
+) -> Dict:
+    """
+    Read-through TTL cache over `collect_graph_for_id`. The course graph only
+    changes on bootstrap, so repeated back/front path lookups skip Neo4j.
+    Returned graphs are shared between callers and must not be mutated.
+    """
+    key = ("one", cid, rel_type.upper(), depth)
+    graph = _get(key)
+    if graph is None:
+        graph = await collect_graph_for_id(driver, cid, rel_type=rel_type, depth=depth)
+        # empty graphs are also what the adapter returns on driver errors; don't pin those
+        if graph["nodes"]:
+            _put(key, graph)
+    return graph
+
+
+async def cached_collect_graph_for_ids(
+    driver: AsyncDriver, ids: List[str], rel_type: str = "REQUIRES", depth: int = 6
+) -> Dict:
+    """Same as `cached_collect_graph`, for the batched multi-id collector."""
+    key = ("many", tuple(sorted(ids)), rel_type.upper(), depth)
+    graph = _get(key)
+    if graph is None:
+        graph = await collect_graph_for_ids(driver, ids, rel_type=rel_type, depth=depth)
+        if graph["nodes"]:
+            _put(key, graph)
+    return graph
+
+
+async def cached_collect_bidirectional_graph(driver: AsyncDriver, cid: str, depth: int = 6) -> Dict:
+    """Same as `cached_collect_graph`, for the combined back/front path collector."""
+    key = ("both", cid, depth)
+    paths = _get(key)
+    if paths is None:
+        paths = await collect_bidirectional_graph(driver, cid, depth=depth)
+        if paths["backpath"]["nodes"] or paths["frontpath"]["nodes"]:
+            _put(key, paths)
+    return paths
+
+
+def clear_graph_cache() -> int:
+    """Drop every cached graph (call after the graph is rebuilt). Returns the number evicted."""
+    n = len(_cache)
+    _cache.clear()
+    return n
@@ -1,49 +1,101 @@
-from ast import List
 import asyncio
-from typing import Dict
-from neo4j import AsyncGraphDatabase, AsyncDriver
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+from neo4j import (
+    AsyncDriver,
+    AsyncGraphDatabase,
+    AsyncManagedTransaction,
+    AsyncResult,
+    AsyncSession,
+)
+
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 _driver: AsyncDriver | None = None
 
+_CY_SCHEMA = (
+    "CREATE CONSTRAINT course_id IF NOT EXISTS FOR (c:Course) REQUIRE c.id IS UNIQUE",
+    "CREATE INDEX course_code IF NOT EXISTS FOR (c:Course) ON (c.code)",
+    # prereq edges are MERGEd and read by group_id
+    "CREATE INDEX requires_group_id IF NOT EXISTS FOR ()-[r:REQUIRES]-() ON (r.group_id)",
+    "CREATE INDEX unlocks_group_id IF NOT EXISTS FOR ()-[r:UNLOCKS]-() ON (r.group_id)",
+)
+
+# UNWIND batch size for bulk writes; bounds per-transaction memory and tx log size
+WRITE_BATCH_SIZE = 10_000
+
+
+def _chunks(rows: List[Dict], size: int = WRITE_BATCH_SIZE) -> Iterator[List[Dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
 
 async def init_neo4j(max_wait_seconds: int = 30) -> None:
     """
     Connect to Neo4j and create the unique constraint. We retry until the
     Bolt server is reachable (up to max_wait_seconds).
+    The driver is a process-wide singleton with its own connection pool; it
+    lives until `close_neo4j()` on app shutdown.
     """
     global _driver
     if _driver is not None:
         return
 
-    deadline = asyncio.get_event_loop().time() + max_wait_seconds
+    deadline = time.monotonic() + max_wait_seconds
     last_err: Exception | None = None
 
-    while asyncio.get_event_loop().time() < deadline:
+    while time.monotonic() < deadline:
         try:
             _driver = AsyncGraphDatabase.driver(
                 settings.neo4j_url,
                 auth=(settings.neo4j_user, settings.neo4j_password),
+                max_connection_pool_size=settings.neo4j_max_connection_pool_size,
+                connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout,
+                keep_alive=settings.neo4j_keep_alive,
+                max_connection_lifetime=settings.neo4j_max_connection_lifetime,
             )
-            # Test the connection and create constraint
+            # Test the connection and create constraint/indexes
             async with _driver.session() as s:
-                await s.run(
-                    "CREATE CONSTRAINT course_id IF NOT EXISTS "
-                    "FOR (c:Course) REQUIRE c.id IS UNIQUE"
-                )
-                await s.run(
-                    "CREATE INDEX course_code IF NOT EXISTS FOR (c:Course) ON (c.code)"
-                )
+                for cy in _CY_SCHEMA:
+                    await s.run(cy)
             return
         except Exception as e:
             last_err = e
+            # don't leak the failed attempt's pool before retrying
+            if _driver is not None:
+                await _driver.close()
+                _driver = None
             await asyncio.sleep(1.0)
     _driver = None
+    logger.warning("Neo4j unreachable after %ss: %s", max_wait_seconds, last_err)
+
+
+async def warmup_neo4j() -> None:
+    """
+    Prime the bolt pool and Neo4j's query plan cache by running each read
+    template once with a dummy id, so the first real request doesn't pay for
+    connection setup and planning. No-op when the driver isn't ready.
+    """
+    if _driver is None:
+        return
+    try:
+        await _driver.verify_connectivity()
+        async with _driver.session() as s:
+            await s.run("RETURN 1")
+    except Exception:
+        return
+    for rel in ("REQUIRES", "UNLOCKS"):
+        await collect_graph_for_id(_driver, "__warmup__", rel_type=rel)
+    await collect_graph_for_ids(_driver, ["__warmup__"], rel_type="REQUIRES")
+    await collect_bidirectional_graph(_driver, "__warmup__")
 
 
 def get_neo4j() -> AsyncDriver | None:
     """Return the driver if ready; otherwise None (so callers can skip graph work)."""
-    print("GET NEO4J DRIVER", _driver._closed)
     return _driver
 
 
@@ -55,98 +107,310 @@ async def close_neo4j() -> None:
         _driver = None
 
 
+# Write statements are module constants: built once, identical text on every call
+_CY_UPSERT_COURSES = """
+    UNWIND $rows AS r
+    MERGE (c:Course {id:r.id})
+    SET   c.code  = r.code,
+          c.title = r.title,
+          c.level = r.level
+    """
+
+_CY_MERGE_PREREQS = """
+    UNWIND $rows AS r
+    MERGE (to:Course {id:r.to_id})
+      ON CREATE SET to.code = replace(r.to_id, '-', ' '), to.title = replace(r.to_id, '-', ' ')
+    MERGE (from:Course {id:r.from_id})
+      ON CREATE SET from.code = replace(r.from_id, '-', ' '),
+                    from.title = replace(r.from_id, '-', ' ')
+
+    MERGE (to)-[:REQUIRES {group_id:r.group_id}]->(from)
+    MERGE (from)-[:UNLOCKS {group_id:r.group_id}]->(to)
+    """
+
+_CY_MERGE_ANTIREQS = """
+    UNWIND $rows AS r
+    MERGE (a:Course {id:r.a_id})
+      ON CREATE SET a.code = replace(r.a_id, '-', ' '), a.title = replace(r.a_id, '-', ' ')
+    MERGE (b:Course {id:r.b_id})
+      ON CREATE SET b.code = replace(r.b_id, '-', ' '), b.title = replace(r.b_id, '-', ' ')
+    MERGE (a)-[:ANTIREQ]->(b)
+    """
+
+
+async def count_course_nodes(driver: AsyncDriver | None) -> int:
+    """Number of :Course nodes (answered from Neo4j's count store); 0 if unavailable."""
+    if not driver:
+        return 0
+    try:
+        async with driver.session() as s:
+            record = await (await s.run("MATCH (c:Course) RETURN count(c) AS n")).single()
+    except Exception:
+        return 0
+    return record["n"] if record else 0
+
+
+async def _write_tx(tx: AsyncManagedTransaction, cypher: str, **params: Any) -> None:
+    """execute_write unit of work: run one statement and drain its result inside the tx."""
+    result = await tx.run(cypher, **params)
+    await result.consume()
+
+
 async def upsert_course_node(
     driver: AsyncDriver, *, id: str, code: str, title: str, level: int | None
-):
+) -> None:
     """
     Upsert a Course node with full properties.
     """
-    cypher = """
-    MERGE (c:Course {id:$id})
-    SET   c.code  = $code,
-          c.title = $title,
-          c.level = $level
-    """
     async with driver.session() as s:
-        await s.run(cypher, id=id, code=code, title=title, level=level)
+        await upsert_course_nodes_bulk(
+            s, [{"id": id, "code": code, "title": title, "level": level}]
+        )
 
 
-async def merge_prereq_edge(driver: AsyncDriver, to_id: str, from_id: str, group_id: str):
+async def upsert_course_nodes_bulk(session: AsyncSession, rows: List[Dict]) -> None:
+    """
+    Upsert many Course nodes with one UNWIND query per WRITE_BATCH_SIZE rows.
+    Runs on the caller's session so a bulk load reuses one session (and its
+    bolt connection) across all writers; each chunk is a managed write
+    transaction, retried by the driver on transient errors.
+    rows: dicts with keys id, code, title, level.
+    """
+    if not rows:
+        return
+    for chunk in _chunks(rows):
+        await session.execute_write(_write_tx, _CY_UPSERT_COURSES, rows=chunk)
+
+
+async def merge_prereq_edge(
+    driver: AsyncDriver, to_id: str, from_id: str, group_id: str
+) -> None:
     """
     REQUIRES: (to)-[:REQUIRES {group_id}]->(from)   # 'to' requires 'from'
     UNLOCKS:  (from)-[:UNLOCKS  {group_id}]->(to)
-    Ensure placeholder nodes get readable fallbacks for code/title.
     """
-    cy = """
-    MERGE (to:Course {id:$to_id})
-      ON CREATE SET to.code = $to_id, to.title = $to_id
-    MERGE (from:Course {id:$from_id})
-      ON CREATE SET from.code = $from_id, from.title = $from_id
+    async with driver.session() as s:
+        await merge_prereq_edges_bulk(
+            s, [{"to_id": to_id, "from_id": from_id, "group_id": group_id}]
+        )
+
 
-    MERGE (to)-[r:REQUIRES {group_id:$group_id}]->(from)
-    MERGE (from)-[:UNLOCKS {group_id:$group_id}]->(to)
-    RETURN id(r)
+async def merge_prereq_edges_bulk(session: AsyncSession, rows: List[Dict]) -> None:
     """
-    async with driver.session() as s:
-        await s.run(cy, to_id=to_id, from_id=from_id, group_id=group_id)
+    Batched `merge_prereq_edge`: one UNWIND query per WRITE_BATCH_SIZE edges.
+    Ensure placeholder nodes get readable fallbacks for code/title
+    (display code "CS 135" stored at write time, so reads never rebuild it).
+    rows: dicts with keys to_id, from_id, group_id.
+    """
+    if not rows:
+        return
+    for chunk in _chunks(rows):
+        await session.execute_write(_write_tx, _CY_MERGE_PREREQS, rows=chunk)
 
 
-async def merge_antireq_edge(driver: AsyncDriver, a_id: str, b_id: str):
+async def merge_antireq_edge(driver: AsyncDriver, a_id: str, b_id: str) -> None:
     """
     ANTIREQ: (a)-[:ANTIREQ]->(b)
+    """
+    async with driver.session() as s:
+        await merge_antireq_edges_bulk(s, [{"a_id": a_id, "b_id": b_id}])
+
+
+async def merge_antireq_edges_bulk(session: AsyncSession, rows: List[Dict]) -> None:
+    """
+    Batched `merge_antireq_edge`: one UNWIND query per WRITE_BATCH_SIZE edges.
     Also give readable fallbacks for nodes created implicitly.
+    rows: dicts with keys a_id, b_id for (a)-[:ANTIREQ]->(b).
     """
-    cy = """
-    MERGE (a:Course {id:$a})
-      ON CREATE SET a.code = $a, a.title = $a
-    MERGE (b:Course {id:$b})
-      ON CREATE SET b.code = $b, b.title = $b
-    MERGE (a)-[:ANTIREQ]->(b)
+    if not rows:
+        return
+    for chunk in _chunks(rows):
+        await session.execute_write(_write_tx, _CY_MERGE_ANTIREQS, rows=chunk)
+
+
+# Read queries are prebuilt per (relationship, depth): Cypher can't parameterize
+# either, so each variant is a fixed string that Neo4j plans once and caches.
+MAX_DEPTH = 6
+_RELS = ("REQUIRES", "UNLOCKS")
+
+
+def _cy_reach(rel: str, depth: int) -> str:
+    # Shared by every read builder so /backpath, /paths and /by-plans agree: with `c`
+    # bound, collect the distinct nodes reachable over `rel` within `depth` hops and
+    # the `rel` links among them, ending with one row of `nodes` and `rls`.
+    return f"""
+      MATCH (c)-[:{rel}*1..{depth}]->(n)
+      WITH c, collect(DISTINCT n) AS ns
+      WITH ns + c AS nodes
+      UNWIND nodes AS a
+      MATCH (a)-[r:{rel}]->(b)
+      WHERE b IN nodes
+      WITH nodes,
+        collect(DISTINCT {{start: a.id, end: b.id, type: type(r), group_id: r.group_id}}) AS rls
     """
-    async with driver.session() as s:
-        await s.run(cy, a=a_id, b=b_id)
 
 
-async def collect_graph_for_id(driver: AsyncDriver, id_value: str, rel_type: str = "REQUIRES", depth: int = 6):
+_NODE_MAP = "[x IN nodes | {id: x.id, code: x.code, title: x.title, level: x.level}]"
+
+
+def _cy_graph_for_id(rel: str, depth: int) -> str:
+    return f"""
+    MATCH (c:Course {{id:$id}})
+    {_cy_reach(rel, depth)}
+    RETURN {_NODE_MAP} AS nds, rls
+    """
+
+
+def _cy_graph_for_ids(rel: str, depth: int) -> str:
+    return f"""
+    UNWIND $ids AS cid
+    CALL {{
+      WITH cid
+      MATCH (c:Course {{id:cid}})
+      {_cy_reach(rel, depth)}
+      RETURN {_NODE_MAP} AS nds, rls
+    }}
+    RETURN nds, rls
+    """
+
+
+def _cy_bidirectional(depth: int) -> str:
+    # each side is a list of at most one {nds, rls} map; the outer collect keeps
+    # the row (as []) when a course has no prereqs or no successors
+    return f"""
+    MATCH (c:Course {{id:$id}})
+    CALL {{
+      WITH c
+      {_cy_reach("REQUIRES", depth)}
+      RETURN collect({{nds: {_NODE_MAP}, rls: rls}}) AS back
+    }}
+    CALL {{
+      WITH c
+      {_cy_reach("UNLOCKS", depth)}
+      RETURN collect({{nds: {_NODE_MAP}, rls: rls}}) AS front
+    }}
+    RETURN back, front
+    """
+
+
+_DEPTHS = range(1, MAX_DEPTH + 1)
+_CY_GRAPH_FOR_ID = {(rel, d): _cy_graph_for_id(rel, d) for rel in _RELS for d in _DEPTHS}
+_CY_GRAPH_FOR_IDS = {(rel, d): _cy_graph_for_ids(rel, d) for rel in _RELS for d in _DEPTHS}
+_CY_BIDIRECTIONAL = {d: _cy_bidirectional(d) for d in _DEPTHS}
+
+
+def _rel_depth(rel_type: str, depth: int) -> Tuple[str, int]:
+    """
+    Map caller args onto a prebuilt variant:
+    unknown rel -> UNLOCKS, depth clamped to 1..MAX_DEPTH.
+    """
+    rel = "REQUIRES" if rel_type.upper() == "REQUIRES" else "UNLOCKS"
+    return rel, max(1, min(depth, MAX_DEPTH))
+
+
+async def collect_graph_for_id(
+    driver: AsyncDriver, id_value: str, rel_type: str = "REQUIRES", depth: int = 6
+) -> Dict:
     """
     Collect a graph starting at node `id_value` following relationship `rel_type`
     outwards up to `depth`. Returns a dict with 'nodes' and 'links'.
     rel_type should be either "REQUIRES" (course -> prereq) or "UNLOCKS" (course -> successor).
+    Nodes and links are deduped in Cypher, so a single record of flat lists
+    comes back instead of one record per path.
     """
     if not driver:
         return {"nodes": [], "links": []}
 
-    rel = "REQUIRES" if rel_type.upper() == "REQUIRES" else "UNLOCKS"
+    cy = _CY_GRAPH_FOR_ID[_rel_depth(rel_type, depth)]
+
+    try:
+        async with driver.session() as sess:
+            result = await sess.run(cy, id=id_value)
+            record = await result.single()
+    except Exception:
+        # If driver/session fails, return empty graph to let caller handle status
+        return {"nodes": [], "links": []}
+
+    if record is None:
+        return {"nodes": [], "links": []}
+    logger.debug(
+        "graph for %s: %d nodes, %d links", id_value, len(record["nds"]), len(record["rls"])
+    )
+    return {"nodes": record["nds"], "links": record["rls"]}
 
-    cy = f"""
-    MATCH path=(c:Course {{id:$id}})-[:{rel}*1..{depth}]->(n)
-    WITH path
-    RETURN
-      [x IN nodes(path) | {{id: x.id, code: x.code, title: x.title, level: x.level}}] AS nds,
-      [r IN relationships(path) | {{start: startNode(r).id, end: endNode(r).id, type: type(r), group_id: r.group_id}}] AS rls
-    LIMIT 200
+
+async def collect_graph_for_ids(
+    driver: AsyncDriver, ids: List[str], rel_type: str = "REQUIRES", depth: int = 6
+) -> Dict:
+    """
+    Batched variant of `collect_graph_for_id`: collect the union of the graphs
+    starting at every node in `ids` with a single Cypher round trip. `ids` is
+    passed as a parameter so Neo4j can reuse the cached plan.
     """
+    if not driver or not ids:
+        return {"nodes": [], "links": []}
 
-    nodes_map: Dict[str, Dict] = {}
-    links: List[Dict] = []
+    cy = _CY_GRAPH_FOR_IDS[_rel_depth(rel_type, depth)]
 
     try:
         async with driver.session() as sess:
-            result = await sess.run(cy, id=id_value)
-            records = await result.data()
+            result = await sess.run(cy, ids=list(ids))
+            # folded inside the session: the result is only readable while it's open
+            return await _graph_from_result(result)
     except Exception:
-        # If driver/session fails, return empty graph to let caller handle status
         return {"nodes": [], "links": []}
-    
-    print("RECORDS FROM NEO4J", records)
 
-    # records is a list of dicts; each dict has keys 'nds' and 'rls'
-    for rec in records:
-        nds = rec.get("nds") or []
-        rls = rec.get("rls") or []
-        for n in nds:
+
+async def collect_bidirectional_graph(
+    driver: AsyncDriver, id_value: str, depth: int = 6
+) -> Dict:
+    """
+    Collect both the prerequisite (REQUIRES) and successor (UNLOCKS) graphs for
+    `id_value` in one round trip. Returns {'backpath': graph, 'frontpath': graph},
+    each shaped like `collect_graph_for_id`'s result.
+    """
+    empty: Dict[str, Dict] = {
+        "backpath": {"nodes": [], "links": []},
+        "frontpath": {"nodes": [], "links": []},
+    }
+    if not driver:
+        return empty
+
+    cy = _CY_BIDIRECTIONAL[max(1, min(depth, MAX_DEPTH))]
+
+    try:
+        async with driver.session() as sess:
+            result = await sess.run(cy, id=id_value)
+            record = await result.single()
+    except Exception:
+        return empty
+
+    if record is None:
+        return empty
+    return {
+        "backpath": _graph_from_records(record["back"]),
+        "frontpath": _graph_from_records(record["front"]),
+    }
+
+
+class _GraphFold:
+    """Incrementally fold `nds`/`rls` records into a deduped {'nodes', 'links'} graph."""
+
+    __slots__ = ("nodes_map", "links", "seen")
+
+    def __init__(self) -> None:
+        self.nodes_map: Dict[str, Dict] = {}
+        self.links: List[Dict] = []
+        # (start, end, type, group_id) of links already emitted;
+        # duplicates are skipped before building a dict
+        self.seen: Set[Tuple[str, str, str, Optional[str]]] = set()
+
+    def add(self, rec: Mapping[str, Any]) -> None:
+        # rec is a dict or neo4j Record with keys 'nds' and 'rls'
+        nodes_map = self.nodes_map
+        for n in rec.get("nds") or []:
             nid = n.get("id")
-            if nid:
+            if nid and nid not in nodes_map:
                 # ensure we have at least id and code/title
                 nodes_map[nid] = {
                     "id": nid,
@@ -154,21 +418,33 @@ async def collect_graph_for_id(driver: AsyncDriver, id_value: str, rel_type: str
                     "title": n.get("title"),
                     "level": n.get("level"),
                 }
-        for r in rls:
-            links.append({
-                "start": r.get("start"),
-                "end": r.get("end"),
-                "type": r.get("type"),
-                "group_id": r.get("group_id"),
-            })
-
-    # dedupe links
-    seen = set()
-    uniq_links = []
-    for l in links:
-        key = (l.get("start"), l.get("end"), l.get("type"), l.get("group_id"))
-        if key not in seen:
-            seen.add(key)
-            uniq_links.append(l)
-
-    return {"nodes": list(nodes_map.values()), "links": uniq_links}
\ No newline at end of file
+        seen = self.seen
+        for r in rec.get("rls") or []:
+            key = (r.get("start"), r.get("end"), r.get("type"), r.get("group_id"))
+            if key not in seen:
+                seen.add(key)
+                self.links.append(
+                    {"start": key[0], "end": key[1], "type": key[2], "group_id": key[3]}
+                )
+
+    def graph(self) -> Dict:
+        return {"nodes": list(self.nodes_map.values()), "links": self.links}
+
+
+def _graph_from_records(records: List[Dict]) -> Dict:
+    """Fold already-materialized path records into a deduped {'nodes', 'links'} graph."""
+    fold = _GraphFold()
+    for rec in records:
+        fold.add(rec)
+    return fold.graph()
+
+
+async def _graph_from_result(result: AsyncResult) -> Dict:
+    """
+    Streaming `_graph_from_records`: fold records as the driver decodes them,
+    without a `.data()` list.
+    """
+    fold = _GraphFold()
+    async for rec in result:
+        fold.add(rec)
+    return fold.graph()
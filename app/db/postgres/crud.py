@@ -1,51 +1,162 @@
+from typing import Any, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import JSON, select, text
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text
-from ..models.courses import Course, CourseTermRule
-from typing import Iterable, Tuple, List
 
-async def get_course_by_code(db: AsyncSession, code: str) -> Course | None:
-    q = select(Course).where(Course.code == code)
-    r = await db.execute(q)
-    return r.scalar_one_or_none()
+from ..models.courses import Course
+
+# course row + its prereq/antireq constraints as JSON arrays, in one round trip
+_COURSE_DETAIL_SQL = text("""
+    SELECT c.id, c.code, c.title, c.description, c.level, cc.prereqs, cc.antireqs
+    FROM course c
+    CROSS JOIN LATERAL (
+        SELECT
+          coalesce(json_agg(json_build_object(
+              'id', k.target_course_id,
+              'code', coalesce(t.code, replace(k.target_course_id, '-', ' ')),
+              'group_id', k.group_id
+          )) FILTER (WHERE k.kind = 'PREREQ'), '[]') AS prereqs,
+          coalesce(json_agg(json_build_object(
+              'id', k.target_course_id,
+              'code', coalesce(t.code, replace(k.target_course_id, '-', ' '))
+          )) FILTER (WHERE k.kind = 'ANTIREQ'), '[]') AS antireqs
+        FROM course_constraint k
+        -- stored display code; targets outside the scraped catalog fall back to the id
+        LEFT JOIN course t ON t.id = k.target_course_id
+        WHERE k.course_id = c.id
+    ) cc
+    WHERE c.code = :code
+""").columns(prereqs=JSON, antireqs=JSON)
+
+async def get_course_detail_by_code(db: AsyncSession, code: str) -> RowMapping | None:
+    r = await db.execute(_COURSE_DETAIL_SQL, {"code": code})
+    return r.mappings().one_or_none()
 
-async def get_all_courses(db: AsyncSession) -> List[Course] | None:
-    q = select(Course)
+async def count_courses(db: AsyncSession) -> int:
+    return (await db.execute(text("SELECT count(*) FROM course"))).scalar_one()
+
+COURSE_LIST_FIELDS = ("id", "code", "title", "description", "level")
+
+async def get_all_course_rows(db: AsyncSession) -> Sequence[Tuple[Any, ...]]:
+    """
+    Plain (id, code, title, description, level) tuples;
+    skips ORM identity-map/entity building.
+    """
+    q = select(*(getattr(Course, f) for f in COURSE_LIST_FIELDS))
     r = await db.execute(q)
-    return r.scalars().all()
-
-async def upsert_course(db: AsyncSession, *, id: str, code: str, title: str, description: str | None, level: int | None):
-    obj = await db.get(Course, id)
-    if not obj:
-        obj = Course(id=id, code=code, title=title, description=description, level=level)
-        db.add(obj)
-    else:
-        obj.code, obj.title, obj.description, obj.level = (
-            code, title, description, level,
-        )
-    await db.flush(); return obj
-
-async def add_term_rules(db: AsyncSession, *, course_id: str, seasons: list[str]):
-    for s in seasons:
-        db.add(CourseTermRule(id=course_id+":"+s, course_id=course_id, season=s))
-    await db.flush()
+    return r.tuples().all()
+
+def _course_upsert_stmt() -> Insert:
+    stmt = insert(Course)
+    return stmt.on_conflict_do_update(
+        index_elements=[Course.id],
+        set_={
+            "code": stmt.excluded.code,
+            "title": stmt.excluded.title,
+            "description": stmt.excluded.description,
+            "level": stmt.excluded.level,
+        },
+    )
+
+# INSERT ... ON CONFLICT (id) DO UPDATE, built once and shared by both upserts
+_COURSE_UPSERT = _course_upsert_stmt()
+
+async def upsert_course(
+    db: AsyncSession,
+    *,
+    id: str,
+    code: str,
+    title: str,
+    description: str | None,
+    level: int | None,
+) -> Course | None:
+    """
+    Single-row upsert in one round trip (no SELECT-then-write); returns the
+    persisted Course. Bulk loads should use `upsert_courses_bulk`.
+    """
+    stmt = _COURSE_UPSERT.values(
+        id=id, code=code, title=title, description=description, level=level,
+    ).returning(Course)
+    return await db.scalar(stmt, execution_options={"populate_existing": True})
+
+async def upsert_courses_bulk(db: AsyncSession, rows: List[dict]) -> None:
+    """
+    Upsert many courses in one executemany INSERT ... ON CONFLICT (id) DO UPDATE.
+    rows: dicts with keys id, code, title, description, level.
+    Doesn't commit; the caller owns the transaction.
+    """
+    if not rows:
+        return
+    await db.execute(_COURSE_UPSERT, rows)
+
+async def add_term_rules(db: AsyncSession, *, course_id: str, seasons: list[str]) -> None:
+    await add_term_rules_bulk(db, [(course_id, s) for s in seasons])
+
+# rules: Iterable[Tuple[course_id, season]]
+async def add_term_rules_bulk(db: AsyncSession, rules: Iterable[Tuple[str, str]]) -> None:
+    rows = [{"id": c + ":" + s, "course_id": c, "season": s} for (c, s) in rules]
+    if not rows:
+        return
+
+    sql = text("""
+        INSERT INTO course_term_rule (id, course_id, season)
+        VALUES (:id, :course_id, :season)
+        ON CONFLICT (id) DO NOTHING
+    """)
+    await db.execute(sql, rows)
+
+# above this many rows add_constraints COPYs into a staging table instead of INSERTing
+COPY_THRESHOLD = 1000
+
+_CONSTRAINT_COLUMNS = ["course_id", "kind", "target_course_id", "group_id"]
+
 
 # edges: Iterable[Tuple[course_id, kind, target_course_id, group_id]]
-async def add_constraints(db: AsyncSession, edges: Iterable[Tuple[str, str, str, str | None]]):
-    rows = []
-    for (c, k, t, g) in edges:
-        rows.append({
-            "course_id": c,
-            "kind": k,                      # 'PREREQ' or 'ANTIREQ'
-            "target_course_id": t,
-            "group_id": g or "",            # normalize None -> ''
-        })
+# Doesn't commit; the caller owns the transaction.
+async def add_constraints(
+    db: AsyncSession, edges: Iterable[Tuple[str, str, str, str | None]]
+) -> None:
+    # 'PREREQ' or 'ANTIREQ'; normalize group None -> '' so the unique constraint dedupes
+    rows = [(c, k, t, g or "") for (c, k, t, g) in edges]
     if not rows:
         return
+    if len(rows) > COPY_THRESHOLD:
+        await _copy_constraints(db, rows)
+        return
 
     sql = text("""
         INSERT INTO course_constraint (course_id, kind, target_course_id, group_id)
         VALUES (:course_id, :kind, :target_course_id, :group_id)
         ON CONFLICT (course_id, kind, target_course_id, group_id) DO NOTHING
     """)
-    await db.execute(sql, rows)
-    await db.commit()
\ No newline at end of file
+    await db.execute(sql, [dict(zip(_CONSTRAINT_COLUMNS, r)) for r in rows])
+
+
+async def _copy_constraints(db: AsyncSession, rows: List[Tuple[str, str, str, str]]) -> None:
+    """
+    Bulk path for large loads: binary COPY into a transaction-scoped temp table,
+    then one INSERT ... SELECT DISTINCT ... ON CONFLICT DO NOTHING. Runs inside
+    the caller's transaction; the staging table is dropped on commit/rollback.
+    """
+    await db.execute(text("""
+        CREATE TEMP TABLE IF NOT EXISTS course_constraint_staging
+            (course_id text, kind text, target_course_id text, group_id text)
+        ON COMMIT DROP
+    """))
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    asyncpg_conn = raw.driver_connection
+    if asyncpg_conn is None:
+        raise RuntimeError("COPY needs an open asyncpg connection")
+    await asyncpg_conn.copy_records_to_table(
+        "course_constraint_staging", records=rows, columns=_CONSTRAINT_COLUMNS
+    )
+    await db.execute(text("""
+        INSERT INTO course_constraint (course_id, kind, target_course_id, group_id)
+        SELECT DISTINCT course_id, kind, target_course_id, group_id FROM course_constraint_staging
+        ON CONFLICT (course_id, kind, target_course_id, group_id) DO NOTHING
+    """))
+    # a second call in the same transaction must not re-insert these rows
+    await db.execute(text("TRUNCATE course_constraint_staging"))
@@ -1,12 +1,29 @@
 from typing import AsyncIterator
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+
 from app.core.config import settings
 
+
 class Base(DeclarativeBase):
     pass
 
-engine = create_async_engine(settings.postgres_url, echo=False, future=True)
+engine = create_async_engine(
+    settings.postgres_url,
+    echo=False,
+    future=True,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    # per-connection prepared statement caches: SQLAlchemy's asyncpg adapter
+    # (prepared_statement_cache_size, default 100) and asyncpg's own (statement_cache_size)
+    connect_args={
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+        "statement_cache_size": settings.db_statement_cache_size,
+    },
+)
 
 async_session: async_sessionmaker[AsyncSession] = async_sessionmaker(
     engine, expire_on_commit=False, class_=AsyncSession
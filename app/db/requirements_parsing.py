@@ -1,33 +1,42 @@
 import re
-from typing import List, Dict
+from typing import Dict, List, Set
 
 # "CS 135", "MATH 239", "MTE 121/GENE 121", "PHYS 139", "CS 146A"
 COURSE_CODE_RE = re.compile(r"\b([A-Z]{2,4})\s*(\d{2,3}[A-Z]?)\b")
+# labeled spans, each running up to the next label
+_PRE_RE = re.compile(r"Prereq:\s*(.*?)(?=Antireq:|Coreq:|$)", re.I | re.S)
+_ANTI_RE = re.compile(r"Antireq:\s*(.*?)(?=Prereq:|Coreq:|$)", re.I | re.S)
+# OR separators: ' or ', comma, slash
+_OR_SPLIT_RE = re.compile(r"\s+or\s+|,|/", re.I)
+# whitespace-delimited "(", ")" and "and" tokens: the only ones the AND split acts on
+_AND_PAREN_RE = re.compile(r"(?<!\S)(?:\(|\)|and)(?!\S)", re.I)
 
-def _codes_in(text: str) -> List[str]:
-    return [f"{a} {b}" for a, b in COURSE_CODE_RE.findall(text or "")]
+def _codes_in(text: str) -> Set[str]:
+    # distinct codes in one findall pass; findall + f-string measures faster than finditer + m[1]
+    return {f"{a} {b}" for a, b in COURSE_CODE_RE.findall(text or "")}
 
 def _split_and_top_level(s: str) -> List[str]:
-    """Top-level split on ' and ' while keeping parenthesized groups intact."""
-    out, buf, depth = [], [], 0
-    tokens = s.split()
-    for tok in tokens:
+    """
+    Top-level split on ' and ' while keeping parenthesized groups intact.
+    Only standalone "(" / ")" tokens nest. One scan visits just those tokens
+    and standalone "and"s by index; parts are slices of `s`, no token list.
+    """
+    out: List[str] = []
+    depth = start = 0
+    for m in _AND_PAREN_RE.finditer(s):
+        tok = m.group()
         if tok == "(":
             depth += 1
         elif tok == ")":
             depth = max(0, depth - 1)
-        if depth == 0 and tok.lower() == "and":
-            out.append(" ".join(buf).strip()); buf = []
-        else:
-            buf.append(tok)
-    if buf: out.append(" ".join(buf).strip())
+        elif depth == 0:
+            out.append(s[start:m.start()].strip())
+            start = m.end()
+    tail = s[start:].strip()
+    if tail:
+        out.append(tail)
     return out
 
-def _split_or_any(s: str) -> List[str]:
-    """Split by ' or ', comma, or slash (OR semantics)."""
-    parts = re.split(r"\s+or\s+|,|/", s, flags=re.I)
-    return [p.strip() for p in parts if p.strip()]
-
 def extract_constraints(requirements_description: str) -> Dict[str, List]:
     """
     Returns:
@@ -40,8 +49,8 @@ def extract_constraints(requirements_description: str) -> Dict[str, List]:
     txt = (requirements_description or "").strip()
 
     # pull labeled spans
-    m_pre  = re.search(r"Prereq:\s*(.*?)(?=Antireq:|Coreq:|$)", txt, flags=re.I|re.S)
-    m_anti = re.search(r"Antireq:\s*(.*?)(?=Prereq:|Coreq:|$)", txt, flags=re.I|re.S)
+    m_pre  = _PRE_RE.search(txt)
+    m_anti = _ANTI_RE.search(txt)
     pre  = (m_pre.group(1).strip()  if m_pre  else "")
     anti = (m_anti.group(1).strip() if m_anti else "")
 
@@ -50,18 +59,13 @@ def extract_constraints(requirements_description: str) -> Dict[str, List]:
         # top-level AND split
         and_parts = _split_and_top_level(pre)
         for part in and_parts:
-            # inside each AND part, split into OR options
-            or_parts = _split_or_any(part)
-            codes = []
-            for chunk in or_parts:
-                codes.extend(_codes_in(chunk))
-            # if no explicit OR split matched, still try to mine codes from the part
-            if not codes:
-                codes = _codes_in(part)
-            codes = sorted(set(codes))
+            # every code in an AND part is one OR option; blank out the separators
+            # first so "CS 136 OR 145" can't yield an "OR 145" code, then mine the
+            # part in one pass (falling back to the raw part if that finds nothing)
+            codes = sorted(_codes_in(_OR_SPLIT_RE.sub(",", part)) or _codes_in(part))
             if codes:
                 prereq_groups.append(codes)
 
-    antireqs = sorted(set(_codes_in(anti)))
+    antireqs = sorted(_codes_in(anti))
 
     return {"prereq_groups": prereq_groups, "antireqs": antireqs}
\ No newline at end of file
@@ -1,15 +1,24 @@
 import asyncio
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1.endpoints.course import router as courses_router
 
+from app.api.v1.endpoints.admin import router as admin_router
+from app.api.v1.endpoints.course import router as courses_router
 from app.core.config import settings
 from app.core.logging import configure_logging
-
-from app.db.neo4j.graph_adapter import init_neo4j, close_neo4j
 from app.db.bootstrap import bootstrap_from_parsed_records
-from app.db.postgres.session import engine, async_session, Base
-from app.parsing import fetch_courses
+from app.db.neo4j.graph_adapter import (
+    close_neo4j,
+    count_course_nodes,
+    get_neo4j,
+    init_neo4j,
+    warmup_neo4j,
+)
+from app.db.postgres.crud import count_courses, get_course_detail_by_code
+from app.db.postgres.session import Base, async_session, engine
+from app.parsing import fetch_courses_async
 
 app = FastAPI(
     title="GradUWate API",
@@ -17,6 +26,7 @@ app = FastAPI(
 )
 
 configure_logging()
+logger = logging.getLogger(__name__)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,32 +37,49 @@ app.add_middleware(
 )
 
 @app.get("/health", tags=["health"])
-def health():
+def health() -> dict[str, str]:
     return {"status": "ok", "service": "course-graph-api"}
 
 @app.get("/", include_in_schema=False)
-def root():
+def root() -> dict[str, str]:
     return {"status": "ok", "message": "Backend is running"}
 
 # --- THE FIX IS HERE ---
-async def run_data_loading():
+async def run_data_loading() -> None:
     """
     Runs the heavy data scraping and DB insertion in the background.
+    Skipped on warm boots, when both stores are already populated.
     """
-    print("⏳ BACKGROUND TASK: Starting data scraping...")
+    if not settings.force_bootstrap:
+        async with async_session() as db:
+            pg_courses = await count_courses(db)
+        graph_courses = await count_course_nodes(get_neo4j())
+        threshold = settings.bootstrap_skip_min_courses
+        if pg_courses >= threshold and graph_courses >= threshold:
+            logger.info(
+                "background task: %d courses in Postgres, %d in Neo4j; skipping data loading",
+                pg_courses, graph_courses,
+            )
+            return
+
+    logger.info("background task: starting data scraping")
     
-    # 1. Run the blocking 'fetch_courses' in a separate thread so it doesn't freeze the server
-    courses_data = await asyncio.to_thread(fetch_courses)
-    print(f"✅ BACKGROUND TASK: Scraped {len(courses_data)} courses. Starting DB insert...")
+    # 1. Fetch concurrently on the loop; page parsing runs in worker processes
+    #    so the server stays responsive
+    courses_data = await fetch_courses_async()
+    logger.info(
+        "background task: scraped %d courses, starting DB insert",
+        len(courses_data["subject_code"]),
+    )
 
     # 2. Insert into DB (this part is already async)
     async with async_session() as db:
         await bootstrap_from_parsed_records(db, courses_data)
     
-    print("🎉 BACKGROUND TASK: Data loading complete!")
+    logger.info("background task: data loading complete")
 
 @app.on_event("startup")
-async def startup():
+async def startup() -> None:
     # 1. Create Postgres Tables (Fast)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -60,12 +87,24 @@ async def startup():
     # 2. Connect to Neo4j (Fast, unless firewall issues)
     await init_neo4j()
 
-    # 3. START DATA LOADING IN BACKGROUND
+    # 3. Warm up connection pools and query plans (Neo4j templates + course lookup)
+    await warmup_neo4j()
+    async with async_session() as db:
+        await get_course_detail_by_code(db, "")
+
+    # 4. START DATA LOADING IN BACKGROUND
     # This creates a task and immediately lets the server continue to start.
     asyncio.create_task(run_data_loading())
 
 @app.on_event("shutdown")
-async def shutdown():
+async def shutdown() -> None:
     await close_neo4j()
 
-app.include_router(courses_router)
\ No newline at end of file
+app.include_router(courses_router)
+app.include_router(admin_router)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
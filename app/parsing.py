@@ -1,12 +1,42 @@
-import re
+import argparse
+import asyncio
+import io
 import json
-import time
+import logging
+import os
+import re
+import sqlite3
+import sys
 import typing as t
-import requests
-from bs4 import BeautifulSoup, Tag
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from functools import lru_cache
+
+import httpx
+from lxml import etree
+
+from app.core.config import settings
+from app.scrape_cache import (
+    CachedPage,
+    PageUpdates,
+    clear_pages,
+    conditional_headers,
+    load_pages,
+    open_cache,
+    save_pages,
+)
+
+logger = logging.getLogger(__name__)
 
 URL_TEMPLATE = "https://ucalendar.uwaterloo.ca/{term}/COURSE/course-{subject}.html"
 
+# max subject pages in flight at once (politeness towards uCalendar)
+FETCH_CONCURRENCY = 16
+FETCH_TIMEOUT = 30.0
+# retries for connect failures (transport) and 5xx responses (backoff 0.2s, 0.4s, 0.8s)
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 0.2
+
 SUBJECTS = [
     "ACTSC", "AFM", "AMATH", "ANTH", "APPLS", "ARBUS", "ARCH", "ARTS",
     "AVIA", "BET", "BIOL", "BUS", "CDNST", "CHE", "CHEM", "CHINA", "CIVE",
@@ -25,155 +55,353 @@ SUBJECTS = [
     ]
 
 # Match headers like: "CS 135 LAB,LEC,TST,TUT 0.50" OR "CS 136L LAB 0.25" OR "CS 489 LEC,TUT 0.50"
-HEADER_RE = re.compile(r"^([A-Z]{2,4})\s+(\d{2,3}[A-Z]?)\s+[A-Z, ]+\s+([0-9.]+)\s*$")
+# (anchored via fullmatch; header text is whitespace-cleaned, so no trailing \s*)
+HEADER_RE = re.compile(r"([A-Z]{2,4})\s+(\d{2,3}[A-Z]?)\s+[A-Z, ]+\s+([0-9.]+)")
 
 REQ_KEYS = ("Prereq:", "Antireq:", "Coreq:")
 
+# bump whenever parse_subject_html's output changes: the scrape cache only
+# reuses records parsed by the same version
+PARSER_VERSION = 1
+
+@dataclass(slots=True)
+class CourseRecord:
+    """
+    One course block from a subject page. Only the fields uCalendar actually
+    provides; the UW API schema's other keys (term, career, consent, ...) are
+    always empty here, so callers needing that shape project from this.
+    """
+    course_id: t.Optional[str]
+    subject_code: str
+    catalog_number: str
+    title: t.Optional[str]
+    description: t.Optional[str]
+    requirements: t.Optional[str]
+
+# fetch_courses returns one list per CourseRecord field
+COURSE_COLUMNS = tuple(f.name for f in fields(CourseRecord))
+_COURSE_ID_RE = re.compile(r"Course\s*ID\s*:\s*([0-9A-Za-z]+)")
+
+# Precompiled XPath, mirroring the old BS4 filter:
+# cells are divs with any class containing 'divTableCell'
+_XP_CELLS = etree.XPath(".//div[contains(@class, 'divTableCell')]")
+_XP_STRONG = etree.XPath("(.//strong)[1]")
+_XP_HEADER_STRONG = etree.XPath(
+    "(.//div[contains(@class, 'divTableCell')])[1]/descendant::strong[1]"
+)
+
+@lru_cache(maxsize=65536)
+def _clean(s: str) -> str:
+    # split() on the same whitespace set as regex \s, in one C-level pass, ~4x faster than re.sub
+    return " ".join(s.split())
+
 def clean_space(s: str) -> str:
-    return re.sub(r"\s+", " ", s or "").strip()
+    # memoized: header/title strings are re-cleaned several times per course block
+    return _clean(s) if s else ""
+
+def _text(el: etree._Element) -> str:
+    # same as BS4 get_text(" ", strip=True) followed by clean_space
+    return clean_space(" ".join(el.itertext()))
+
+def _first_strong(el: etree._Element) -> etree._Element | None:
+    found = _XP_STRONG(el)
+    return found[0] if found else None
 
 def collapse_req_lines(text: str) -> str:
     """
     From a blob of description and <em> notes, pull out lines starting with
-    Prereq:/Antireq:/Coreq: and join them. Keep order.
+    Prereq:/Antireq:/Coreq: and join them, in REQ_KEYS order. The first span
+    per label runs to the next requirement label or end-of-string; spans are
+    located with str.find (linear, C-level) rather than a backtracking regex.
     """
-    out: list[str] = []
+    spans: list[str] = []
     for key in REQ_KEYS:
-        # capture from key to next requirement tag or end-of-string
-        m = re.search(rf"({re.escape(key)}.*?)(?=(?:Prereq:|Antireq:|Coreq:|$))", text)
-        if m:
-            piece = clean_space(m.group(1))
-            if piece and piece not in out:
-                out.append(piece)
-    return " ".join(out)
+        start = text.find(key)
+        if start == -1:
+            continue
+        body = start + len(key)
+        end = len(text)
+        for other in REQ_KEYS:
+            nxt = text.find(other, body, end)
+            if nxt != -1:
+                end = nxt
+        spans.append(clean_space(text[start:end]))
+    return " ".join(spans)
 
-def parse_divtable(divtable: Tag) -> t.Optional[dict]:
+def parse_divtable(divtable: etree._Element) -> t.Optional[CourseRecord]:
     """
-    Parse one <div class="divTable">…</div> course block.
+    Parse one <div class="divTable">…</div> course block (an lxml element).
     Expected structure (cells are all <div class="divTableCell ...">):
       [0]: "<strong>CS 135 LAB,LEC,TST,TUT 0.50</strong>"
       [1]: 'Course ID: 012040'  (class 'crseid')
       [2]: "<strong>Designing Functional Programs</strong>"  (title)
       [3+]: description (plain text cell(s)); other <em> lines include notes/prereq/antireq/coreq
     """
-    cells = [c for c in divtable.find_all("div", class_=lambda x: x and "divTableCell" in x)]
-    if not cells:
-        return None
-
-    # cell[0] – header with subject code, number, components & credit weight
-    header_cell = cells[0]
-    header_strong = header_cell.find("strong")
-    if not header_strong:
+    # cell[0] – header with subject code, number, components & credit weight.
+    # Checked before collecting the cells so non-course blocks cost one lookup.
+    header = _XP_HEADER_STRONG(divtable)
+    if not header:
         return None
-    header_text = clean_space(header_strong.get_text(" ", strip=True))
+    header_text = _text(header[0])
 
-    m = HEADER_RE.match(header_text)
+    m = HEADER_RE.fullmatch(header_text)
     if not m:
         # skip non-course blocks
         return None
 
+    cells = _XP_CELLS(divtable)
+
     subject, number, credit = m.groups()
 
-    # Find Course ID from any cell with class 'crseid'
+    # One pass over the cells: any 'crseid' cell carries the Course ID; the title is
+    # the first later cell whose <strong> differs from the header; the description
+    # is the text of every cell after it (plus any non-<strong> text in the title
+    # cell). With no title, every non-header cell is description.
     course_id = None
-    for c in cells:
-        if "crseid" in (c.get("class") or []):
-            cid_txt = clean_space(c.get_text(" ", strip=True))
+    title = ""
+    desc_parts: list[str] = []
+    before_title: list = []
+    for i, c in enumerate(cells):
+        if course_id is None and "crseid" in (c.get("class") or "").split():
             # e.g. "Course ID: 012040"
-            m_id = re.search(r"Course\s*ID\s*:\s*([0-9A-Za-z]+)", cid_txt)
+            m_id = _COURSE_ID_RE.search(_text(c))
             if m_id:
                 course_id = m_id.group(1)
-                break
-
-    # Title is the first subsequent cell that has a <strong> not equal to the header.
-    title = ""
-    for c in cells[1:]:
-        st = c.find("strong")
-        if st:
-            ttxt = clean_space(st.get_text(" ", strip=True))
-            if ttxt and ttxt != header_text:
-                title = ttxt
-                break
+        if i == 0:
+            continue
 
-    # Description is the concatenation of later cells' text (excluding header/title-only cells),
-    # but we ignore pure empty and we keep <em> content (notes/prereqs) inside description too.
-    desc_parts: list[str] = []
-    # Once we've passed the title cell, we collect everything that isn't only whitespace.
-    passed_title = False if title else True
-    for c in cells[1:]:
-        # if this cell was the title cell, mark passed_title and continue
-        st = c.find("strong")
-        if st:
-            ctxt = clean_space(st.get_text(" ", strip=True))
-            if ctxt == title and not passed_title:
-                passed_title = True
-                # capture *other* text in the title cell if any besides the strong:
-                extra = clean_space(c.get_text(" ", strip=True).replace(ctxt, "", 1))
-                if extra:
-                    desc_parts.append(extra)
-                continue
-
-        if not passed_title:
+        if title:
+            txt = _text(c)
+            if txt:
+                desc_parts.append(txt)
             continue
 
-        txt = clean_space(c.get_text(" ", strip=True))
-        if txt:
-            desc_parts.append(txt)
+        st = _first_strong(c)
+        ttxt = _text(st) if st is not None else ""
+        if ttxt and ttxt != header_text:
+            title = ttxt
+            # capture *other* text in the title cell if any besides the strong:
+            extra = clean_space(_text(c).replace(ttxt, "", 1))
+            if extra:
+                desc_parts.append(extra)
+        else:
+            before_title.append(c)
+
+    if not title:
+        desc_parts = [txt for txt in map(_text, before_title) if txt]
 
-    description = clean_space(" ".join(desc_parts))
+    # parts are already cleaned and non-empty, so joining them is already normalized
+    description = " ".join(desc_parts)
     requirements = collapse_req_lines(description)
 
-    return {
-        # matching your schema keys
-        "courseId": course_id,
-        "courseOfferNumber": None,  # not on page
-        "termCode": None,
-        "termName": None,
-        "associatedAcademicCareer": None,
-        "associatedAcademicGroupCode": None,
-        "associatedAcademicOrgCode": None,
-        "subjectCode": subject,
-        "catalogNumber": number,
-        "title": title or None,
-        "descriptionAbbreviated": None,
-        "description": description or None,
-        "gradingBasis": None,
-        "courseComponentCode": None,  # e.g., LEC/LAB/TST is in header but multi-valued; keeping None for now
-        "enrollConsentCode": None,
-        "enrollConsentDescription": None,
-        "dropConsentCode": None,
-        "dropConsentDescription": None,
-        "requirementsDescription": requirements or None,
-        # (You can add "creditWeight": credit if you want to persist it)
-    }
-
-def parse_subject(url: str) -> list[dict]:
-    r = requests.get(url, timeout=30)
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+    # header credit weight and components aren't persisted
+    return CourseRecord(
+        course_id=course_id,
+        # interned: every course of a subject shares one string
+        subject_code=sys.intern(subject),
+        catalog_number=number,
+        title=title or None,
+        description=description or None,
+        requirements=requirements or None,
+    )
 
-    courses: list[dict] = []
+def parse_subject_html(html: str) -> list[CourseRecord]:
+    """
+    Parse every course block on one subject page; pure (no I/O).
+    Streams the page with iterparse: each divTable is parsed as soon as its
+    closing tag arrives, then cleared and pruned together with everything
+    before it (nav, scripts, earlier courses), so the page tree never
+    accumulates in memory.
+    """
+    if not html.strip():
+        return []
+
+    courses: list[CourseRecord] = []
     # Each individual course is wrapped in <center><div class="divTable">…</div></center>
-    for divtable in soup.find_all("div", class_="divTable"):
-        rec = parse_divtable(divtable)
+    events = etree.iterparse(
+        io.BytesIO(html.encode()), events=("end",), tag="div", html=True, encoding="utf-8",
+        remove_comments=True, remove_pis=True,
+    )
+    for _, el in events:
+        if "divTable" not in (el.get("class") or "").split():
+            continue
+        rec = parse_divtable(el)
         if rec:
             courses.append(rec)
+        el.clear(keep_tail=True)
+        # drop already-seen siblings at every level, not just the table's own contents
+        for node in (el, *el.iterancestors()):
+            parent = node.getparent()
+            while parent is not None and node.getprevious() is not None:
+                del parent[0]
     return courses
 
-def fetch_courses(term_code: str = "2223"):
+def parse_subject(url: str) -> list[CourseRecord]:
+    r = httpx.get(url, timeout=FETCH_TIMEOUT, follow_redirects=True)
+    r.raise_for_status()
+    return parse_subject_html(r.text)
+
+def _client(transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncClient:
+    """
+    One keep-alive pool to uCalendar sized to the fetch concurrency, so every
+    subject reuses a connection. HTTP/2 lets concurrent fetches multiplex over
+    a single TLS connection; with the brotli extra installed httpx also
+    advertises and decodes `br`. Pool options live on the transport, since
+    the client ignores them once a transport is given. Redirects are followed
+    (as requests did), so a moved subject page is still scraped. `transport`
+    overrides the network transport, e.g. with httpx.MockTransport in tests.
+    """
+    if transport is None:
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=FETCH_CONCURRENCY, max_keepalive_connections=FETCH_CONCURRENCY
+            ),
+            retries=FETCH_RETRIES,
+        )
+    return httpx.AsyncClient(timeout=FETCH_TIMEOUT, transport=transport, follow_redirects=True)
+
+async def _fetch(
+    client: httpx.AsyncClient,
+    url: str,
+    sem: asyncio.Semaphore,
+    headers: dict[str, str] | None = None,
+) -> httpx.Response:
+    async with sem:
+        for attempt in range(FETCH_RETRIES + 1):
+            r = await client.get(url, headers=headers)
+            if r.status_code < 500 or attempt == FETCH_RETRIES:
+                break
+            await asyncio.sleep(FETCH_BACKOFF * 2 ** attempt)
+        if r.status_code != 304:
+            r.raise_for_status()
+        return r
+
+@lru_cache(maxsize=8)
+def _urls_for(term_code: str) -> tuple[str, ...]:
+    return tuple(URL_TEMPLATE.format(term=term_code, subject=s) for s in SUBJECTS)
+
+def _records_from_json(records: str) -> list[CourseRecord]:
+    out = [CourseRecord(**rec) for rec in json.loads(records)]
+    for rec in out:
+        rec.subject_code = sys.intern(rec.subject_code)
+    return out
+
+def _read_cache(path: str) -> dict[str, CachedPage]:
+    conn = open_cache(path)
+    try:
+        return load_pages(conn, PARSER_VERSION)
+    finally:
+        conn.close()
+
+def _write_cache(path: str, updates: PageUpdates) -> None:
+    conn = open_cache(path)
+    try:
+        save_pages(conn, updates, PARSER_VERSION)
+    finally:
+        conn.close()
+
+async def _fetch_and_parse(
+    client: httpx.AsyncClient,
+    url: str,
+    sem: asyncio.Semaphore,
+    pool: ProcessPoolExecutor,
+    cached: CachedPage | None,
+    updates: PageUpdates,
+) -> list[CourseRecord]:
+    if cached is not None and cached.is_fresh(settings.scrape_cache_ttl_seconds):
+        # fetched recently: no network at all
+        return await asyncio.to_thread(_records_from_json, cached.records)
+    r = await _fetch(client, url, sem, conditional_headers(cached))
+    if r.status_code == 304 and cached is not None:
+        # unchanged since last run: reuse its parsed records, skip the parse
+        updates.touched.append(url)
+        return await asyncio.to_thread(_records_from_json, cached.records)
+    # HTML parsing is CPU-bound under the GIL; a worker process parses while the loop keeps fetching
+    records = await asyncio.get_running_loop().run_in_executor(pool, parse_subject_html, r.text)
+    updates.add(
+        url,
+        r.headers.get("ETag"),
+        r.headers.get("Last-Modified"),
+        [asdict(rec) for rec in records],
+    )
+    return records
+
+async def fetch_courses_async(term_code: str = "2223") -> dict[str, list]:
+    """
+    Fetch every subject page concurrently over one pooled client (at most
+    FETCH_CONCURRENCY in flight) and parse each page in a process pool as soon
+    as it arrives. A failed subject is logged and skipped; the rest still load.
+    Pages fetched within settings.scrape_cache_ttl_seconds come straight from
+    the scrape cache (settings.scrape_cache_path; empty disables it); older
+    ones are requested conditionally, so unchanged subjects cost a 304 and no
+    parsing. Cache writes are collected and saved in one transaction at the end.
+    The cache is only an optimisation: if it can't be read the scrape fetches
+    everything, and if it can't be written the results are still returned.
+    Returns the catalog column-wise: {column: [value per course]} for
+    COURSE_COLUMNS, all lists the same length.
+    """
+    urls = _urls_for(term_code)
+    sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+    cache_path = settings.scrape_cache_path
+    cached: dict[str, CachedPage] = {}
+    if cache_path:
+        # sqlite I/O stays off the event loop
+        try:
+            cached = await asyncio.to_thread(_read_cache, cache_path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("scrape cache %s unreadable, fetching every page: %s", cache_path, e)
+    updates = PageUpdates()
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        async with _client() as client:
+            pages = await asyncio.gather(
+                *(
+                    _fetch_and_parse(client, url, sem, pool, cached.get(url), updates)
+                    for url in urls
+                ),
+                return_exceptions=True,
+            )
+    if cache_path:
+        try:
+            await asyncio.to_thread(_write_cache, cache_path, updates)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("scrape cache %s not updated: %s", cache_path, e)
+
+    columns: dict[str, list] = {key: [] for key in COURSE_COLUMNS}
+    for url, page in zip(urls, pages):
+        if isinstance(page, BaseException):
+            logger.warning("failed %s: %s", url, page)
+            continue
+        for key, col in columns.items():
+            col.extend(getattr(rec, key) for rec in page)
+    return columns
+
+def fetch_courses(term_code: str = "2223") -> dict[str, list]:
     """
     Public helper to fetch a subject's courses from live uCalendar HTML
     (used as a stand-in for the real UW API).
+    Sync wrapper over `fetch_courses_async`; call it off the event loop.
     """
-    all_courses: list[dict] = []
+    return asyncio.run(fetch_courses_async(term_code))
 
-    try:
-        for s in SUBJECTS:
-            url = URL_TEMPLATE.format(term=term_code, subject=s)
-            subj_courses = parse_subject(url)
-            all_courses.extend(subj_courses)
-
-    except Exception as e:
-        print(f"[warn] failed {url}: {e}")
-    
-    return all_courses
\ No newline at end of file
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    `python -m app.parsing [--term 2223] [--flush-cache]`:
+    scrape uCalendar and report the course count.
+    """
+    ap = argparse.ArgumentParser(description="Scrape uCalendar course pages.")
+    ap.add_argument("--term", default="2223", help="uCalendar term code")
+    ap.add_argument(
+        "--flush-cache", action="store_true",
+        help="forget cached pages first, so every subject is re-downloaded",
+    )
+    args = ap.parse_args(argv)
+    if args.flush_cache and settings.scrape_cache_path:
+        print(f"flushed {clear_pages(settings.scrape_cache_path)} cached pages")
+    courses = fetch_courses(args.term)
+    print(f"scraped {len(courses['course_id'])} courses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Sidecar for the uCalendar scraper: per-URL HTTP validators plus the records
+# parsed from that page, so an unchanged page (304) skips download and parsing,
+# and a page fetched within the TTL skips the network entirely. Rows carry the
+# version of the parser that produced them; rows from another version are
+# ignored, so a parser change re-fetches and re-parses every page.
+
+# bump when the table changes; an older cache file is simply rebuilt
+_SCHEMA_VERSION = 4
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS page (
+    url            TEXT PRIMARY KEY,
+    parser_version INTEGER NOT NULL,
+    etag           TEXT,
+    last_modified  TEXT,
+    records        TEXT NOT NULL,
+    fetched_at     REAL NOT NULL
+)
+"""
+
+
+class CachedPage(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    records: str  # JSON list of parsed course dicts
+    fetched_at: float  # unix time of the last 200/304 for this URL
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return time.time() - self.fetched_at < ttl_seconds
+
+
+def open_cache(path: str) -> sqlite3.Connection:
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    conn = sqlite3.connect(path)
+    # WAL: the end-of-scrape write doesn't block readers; with synchronous=NORMAL
+    # commits skip the per-transaction fsync (a crash can lose only the last write)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS page")
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def load_pages(conn: sqlite3.Connection, parser_version: int) -> Dict[str, CachedPage]:
+    """Every page cached by this parser version, in one query, keyed by URL."""
+    rows = conn.execute(
+        "SELECT url, etag, last_modified, records, fetched_at FROM page WHERE parser_version = ?",
+        (parser_version,),
+    )
+    return {url: CachedPage(*rest) for url, *rest in rows}
+
+
+def conditional_headers(page: Optional[CachedPage]) -> Dict[str, str]:
+    """
+    If-None-Match / If-Modified-Since for a cached page
+    (ETags are sent verbatim, quotes included).
+    """
+    headers: Dict[str, str] = {}
+    if page is not None:
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+    return headers
+
+
+class PageUpdates:
+    """Cache writes gathered during one scrape, flushed together by `save_pages`."""
+
+    __slots__ = ("stored", "touched")
+
+    def __init__(self) -> None:
+        # records are JSON-encoded by save_pages, which callers run off the event loop
+        self.stored: List[Tuple[str, Optional[str], Optional[str], List[dict]]] = []
+        self.touched: List[str] = []  # URLs revalidated by a 304
+
+    def add(
+        self, url: str, etag: Optional[str], last_modified: Optional[str], records: List[dict]
+    ) -> None:
+        self.stored.append((url, etag, last_modified, records))
+
+
+def save_pages(conn: sqlite3.Connection, updates: PageUpdates, parser_version: int) -> None:
+    """Apply a scrape's cache writes with one executemany each, in a single transaction."""
+    now = time.time()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO page "
+            "(url, parser_version, etag, last_modified, records, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (url, parser_version, etag, last_modified, json.dumps(records), now)
+                for url, etag, last_modified, records in updates.stored
+            ],
+        )
+        conn.executemany(
+            "UPDATE page SET fetched_at = ? WHERE url = ?",
+            [(now, url) for url in updates.touched],
+        )
+
+
+def clear_pages(path: str) -> int:
+    """
+    Drop every cached page so the next scrape re-downloads everything.
+    Returns the number removed.
+    """
+    if not os.path.exists(path):
+        return 0
+    conn = open_cache(path)
+    try:
+        with conn:
+            return conn.execute("DELETE FROM page").rowcount
+    finally:
+        conn.close()
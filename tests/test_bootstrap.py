@@ -0,0 +1,19 @@
+import pytest
+
+from app.db.bootstrap import _level
+
+
+@pytest.mark.parametrize(
+    "number, level",
+    [
+        ("136", 100),
+        ("136L", 100),
+        ("99", 0),
+        ("1000", 1000),
+        ("4510", 4500),
+        ("L1", None),
+        ("", None),
+    ],
+)
+def test_level_from_leading_digits(number, level):
+    assert _level(number) == level
@@ -0,0 +1,23 @@
+import pytest
+
+from app.api.v1.endpoints.course import _code_to_id, _normalize_code_to_store
+
+
+@pytest.mark.parametrize(
+    "code, stored, course_id",
+    [
+        ("CS482", "CS 482", "CS-482"),
+        ("CS 482", "CS 482", "CS-482"),
+        ("cs 482", "CS 482", "CS-482"),
+        ("cs-135", "CS 135", "CS-135"),
+        ("  MATH  135 ", "MATH 135", "MATH-135"),
+        ("CS 136L", "CS 136L", "CS-136L"),
+        ("cs136l", "CS 136L", "CS-136L"),
+        # a single-letter prefix isn't a subject code: left compact
+        ("A1", "A1", "A1"),
+        ("X 100", "X 100", "X-100"),
+    ],
+)
+def test_code_normalization(code, stored, course_id):
+    assert _normalize_code_to_store(code) == stored
+    assert _code_to_id(code) == course_id
@@ -0,0 +1,33 @@
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db.neo4j import cache
+from app.main import app
+
+client = TestClient(app)
+
+def test_cached_collect_graph_hits_neo4j_once(monkeypatch):
+    calls = []
+
+    async def fake_collect(driver, cid, rel_type="REQUIRES", depth=6):
+        calls.append(cid)
+        return {"nodes": [{"id": cid}], "links": []}
+
+    monkeypatch.setattr(cache, "collect_graph_for_id", fake_collect)
+    cache.clear_graph_cache()
+
+    first = asyncio.run(cache.cached_collect_graph(None, "CS-135"))
+    second = asyncio.run(cache.cached_collect_graph(None, "CS-135"))
+    assert first == second == {"nodes": [{"id": "CS-135"}], "links": []}
+    assert calls == ["CS-135"]
+
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    assert client.post("/api/v1/admin/cache/flush").status_code == 401
+    r = client.post("/api/v1/admin/cache/flush", headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 200
+    assert r.json() == {"flushed": 1}
+    asyncio.run(cache.cached_collect_graph(None, "CS-135"))
+    assert calls == ["CS-135", "CS-135"]
@@ -0,0 +1,55 @@
+import asyncio
+
+import httpx
+
+from app import parsing
+from app.parsing import parse_subject_html
+
+PAGE = """
+<html><body>
+<center><div class="divTable"><div class="divTableBody"><div class="divTableRow">
+  <div class="divTableCell">Faculty of Mathematics</div>
+</div></div></div></center>
+<center><div class="divTable"><div class="divTableBody">
+  <div class="divTableRow"><div class="divTableCell colspan-2">
+    <strong>CS 136 LAB,LEC,TST,TUT 0.50</strong></div></div>
+  <div class="divTableRow"><div class="divTableCell crseid">Course ID: 012041</div></div>
+  <div class="divTableRow"><div class="divTableCell colspan-2">
+    <strong>Elementary Algorithm Design and Data Abstraction</strong></div></div>
+  <div class="divTableRow"><div class="divTableCell colspan-2">This course builds on the techniques
+     and patterns learned in CS 135.</div></div>
+  <div class="divTableRow"><div class="divTableCell colspan-2"><em>Prereq: CS 135 or CS 145;
+     Honours Mathematics students only.</em></div></div>
+  <div class="divTableRow"><div class="divTableCell colspan-2">
+    <em>Antireq: CS 138, 146</em></div></div>
+</div></div></center>
+</body></html>
+"""
+
+
+def test_parse_subject_html_extracts_course_blocks():
+    [course] = parse_subject_html(PAGE)
+    assert course.course_id == "012041"
+    assert course.subject_code == "CS"
+    assert course.catalog_number == "136"
+    assert course.title == "Elementary Algorithm Design and Data Abstraction"
+    assert course.description.startswith("This course builds on the techniques and patterns")
+    assert course.requirements == (
+        "Prereq: CS 135 or CS 145; Honours Mathematics students only. Antireq: CS 138, 146"
+    )
+
+
+def test_fetch_follows_redirects():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.scheme == "http":
+            https = request.url.copy_with(scheme="https")
+            return httpx.Response(301, headers={"Location": str(https)})
+        return httpx.Response(200, text=PAGE)
+
+    async def fetch() -> httpx.Response:
+        async with parsing._client(httpx.MockTransport(handler)) as client:
+            return await parsing._fetch(client, "http://ucalendar.test/CS", asyncio.Semaphore(1))
+
+    r = asyncio.run(fetch())
+    assert r.status_code == 200
+    assert [c.course_id for c in parse_subject_html(r.text)] == ["012041"]
@@ -0,0 +1,45 @@
+
+from app.db.requirements_parsing import extract_constraints
+
+
+def test_or_alternatives_form_one_group():
+    parsed = extract_constraints("Prereq: CS 136 or CS 146; Antireq: CS 240E")
+    assert parsed == {"prereq_groups": [["CS 136", "CS 146"]], "antireqs": ["CS 240E"]}
+
+
+def test_top_level_and_splits_groups():
+    parsed = extract_constraints(
+        "Prereq: MATH 135 and ( MATH 136 or MATH 146 ) and STAT 230/240 Coreq: CS 245"
+    )
+    assert parsed["prereq_groups"] == [["MATH 135"], ["MATH 136", "MATH 146"], ["STAT 230"]]
+    assert parsed["antireqs"] == []
+
+
+def test_labels_in_any_order():
+    parsed = extract_constraints("Antireq: CS 115, CS 135 Prereq: 4U Calculus")
+    assert parsed == {"prereq_groups": [], "antireqs": ["CS 115", "CS 135"]}
+
+
+def test_empty_requirements():
+    assert extract_constraints("") == {"prereq_groups": [], "antireqs": []}
+    assert extract_constraints(None) == {"prereq_groups": [], "antireqs": []}
+
+
+def test_and_inside_parentheses_does_not_split():
+    parsed = extract_constraints("Prereq: ( CS 136 and MATH 136 ) or CS 146")
+    assert parsed["prereq_groups"] == [["CS 136", "CS 146", "MATH 136"]]
+
+
+def test_only_standalone_parentheses_nest():
+    parsed = extract_constraints("Prereq: (CS 136 and MATH 136) or CS 146")
+    assert parsed["prereq_groups"] == [["CS 136"], ["CS 146", "MATH 136"]]
+
+
+def test_leading_and_is_consumed():
+    parsed = extract_constraints("Prereq: AND 60% in CS 136")
+    assert parsed["prereq_groups"] == [["CS 136"]]
+
+
+def test_uppercase_or_is_a_separator_not_a_subject():
+    parsed = extract_constraints("Prereq: CS 136 OR 145")
+    assert parsed["prereq_groups"] == [["CS 136"]]
@@ -0,0 +1,135 @@
+import asyncio
+import sqlite3
+import time
+
+import httpx
+import pytest
+
+from app import parsing, scrape_cache
+from app.core.config import settings
+from tests.test_parsing import PAGE
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class FakeUCalendar:
+    """Serves PAGE with validators; answers a matching If-None-Match with 304."""
+
+    def __init__(self) -> None:
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == ETAG:
+            return httpx.Response(304)
+        return httpx.Response(
+            200, text=PAGE, headers={"ETag": ETAG, "Last-Modified": LAST_MODIFIED}
+        )
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    fake = FakeUCalendar()
+    real_client = parsing._client
+    monkeypatch.setattr(parsing, "_client", lambda: real_client(httpx.MockTransport(fake)))
+    monkeypatch.setattr(parsing, "SUBJECTS", ["CS"])
+    monkeypatch.setattr(settings, "scrape_cache_path", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(settings, "scrape_cache_ttl_seconds", 3600)
+    parsing._urls_for.cache_clear()
+    yield fake
+    parsing._urls_for.cache_clear()
+
+
+def scrape() -> dict[str, list]:
+    return asyncio.run(parsing.fetch_courses_async())
+
+
+def cached_pages() -> dict[str, scrape_cache.CachedPage]:
+    conn = scrape_cache.open_cache(settings.scrape_cache_path)
+    try:
+        return scrape_cache.load_pages(conn, parsing.PARSER_VERSION)
+    finally:
+        conn.close()
+
+
+def test_fresh_page_is_served_without_a_request(server):
+    first = scrape()
+    assert first["course_id"] == ["012041"]
+    [page] = cached_pages().values()
+    assert (page.etag, page.last_modified) == (ETAG, LAST_MODIFIED)
+
+    assert scrape() == first
+    assert len(server.requests) == 1
+
+
+def test_expired_page_is_revalidated_and_304_reuses_records(server, monkeypatch):
+    first = scrape()
+    fetched_at = next(iter(cached_pages().values())).fetched_at
+
+    monkeypatch.setattr(settings, "scrape_cache_ttl_seconds", 0)
+    assert scrape() == first
+    revalidation = server.requests[-1]
+    assert revalidation.headers["If-None-Match"] == ETAG
+    assert revalidation.headers["If-Modified-Since"] == LAST_MODIFIED
+    # the 304 refreshed the TTL clock
+    assert next(iter(cached_pages().values())).fetched_at > fetched_at
+
+
+def test_records_from_another_parser_version_are_refetched(server, monkeypatch):
+    scrape()
+    monkeypatch.setattr(parsing, "PARSER_VERSION", parsing.PARSER_VERSION + 1)
+    assert scrape()["course_id"] == ["012041"]
+    # unconditional GET: the old version's validators aren't reused
+    assert "If-None-Match" not in server.requests[-1].headers
+    assert len(server.requests) == 2
+
+
+def test_unreadable_cache_is_not_fatal(server):
+    with open(settings.scrape_cache_path, "wb") as f:
+        f.write(b"not a sqlite database" * 10)
+    assert scrape()["course_id"] == ["012041"]
+
+
+def test_schema_version_mismatch_rebuilds_the_table(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE page (url TEXT PRIMARY KEY, html TEXT)")
+    conn.execute("INSERT INTO page VALUES ('u', '<html/>')")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    conn = scrape_cache.open_cache(path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == scrape_cache._SCHEMA_VERSION
+        assert scrape_cache.load_pages(conn, 1) == {}
+    finally:
+        conn.close()
+
+
+def test_save_pages_stores_and_touches_in_one_call(tmp_path):
+    conn = scrape_cache.open_cache(str(tmp_path / "cache.sqlite3"))
+    try:
+        first = scrape_cache.PageUpdates()
+        first.add("a", ETAG, None, [{"course_id": "1"}])
+        first.add("b", None, LAST_MODIFIED, [])
+        scrape_cache.save_pages(conn, first, 1)
+        before = scrape_cache.load_pages(conn, 1)
+        assert set(before) == {"a", "b"}
+        assert before["a"].records == '[{"course_id": "1"}]'
+
+        time.sleep(0.01)
+        second = scrape_cache.PageUpdates()
+        second.add("c", None, None, [])
+        second.touched.append("a")
+        scrape_cache.save_pages(conn, second, 1)
+        after = scrape_cache.load_pages(conn, 1)
+        assert set(after) == {"a", "b", "c"}
+        assert after["a"].fetched_at > before["a"].fetched_at
+        assert after["a"].records == before["a"].records
+        assert after["b"].fetched_at == before["b"].fetched_at
+        # rows are keyed by parser version as well
+        assert scrape_cache.load_pages(conn, 2) == {}
+    finally:
+        conn.close()